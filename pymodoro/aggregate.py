@@ -0,0 +1,150 @@
+"""
+Aggregation of many users' pomodoro logs.
+
+Logs are split into byte-range chunks that are parsed in parallel on
+a process pool. Each chunk returns compact per-identifier results:
+per-day counts deduplicated within the chunk, plus its first and last
+entry so the INTERVAL_MIN dedup can be fixed up across chunk
+boundaries when the results are merged.
+
+"""
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import collections
+import concurrent.futures
+import glob
+import os
+
+import numpy as np
+
+from . import analytics
+from .session_control import ENTRY_PATTERN_BYTES
+
+CHUNK_SIZE = 16 * 1024 * 1024
+
+
+class ChunkResult(NamedTuple):
+    first: int
+    first_day: int
+    last: int
+    counts: Dict[int, int]
+
+
+def find_logs(pattern: str) -> List[str]:
+    """All files below a directory, or the files matching a glob."""
+    if os.path.isdir(pattern):
+        paths = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(pattern)
+            for name in names
+        ]
+    else:
+        paths = glob.glob(os.path.expanduser(pattern), recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def user_name(path: str, root: str) -> str:
+    """`alice.log` and `alice/.pomodoro_log` both belong to alice."""
+    relative = os.path.relpath(path, root) if os.path.isdir(root) else os.path.basename(path)
+    directory, name = os.path.split(relative)
+    if name.lstrip(".") == "pomodoro_log":
+        # Globs and the root directory itself name no user: use the parent.
+        return directory or os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return name.split(".")[0] or name
+
+
+def split_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> List[Tuple[str, int, int]]:
+    size = os.path.getsize(path)
+    return [
+        (path, start, min(start + chunk_size, size))
+        for start in range(0, max(size, 1), chunk_size)
+    ]
+
+
+def read_chunk(path: str, start: int, end: int) -> Iterator[bytes]:
+    """Lines starting within [start, end) of the file."""
+    with open(path, 'rb') as f:
+        if start:
+            # The line straddling `start` belongs to the previous chunk.
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def parse_chunk(task: Tuple[str, int, int]) -> Dict[str, ChunkResult]:
+    dates = collections.defaultdict(list)
+    for line in read_chunk(*task):
+        match = ENTRY_PATTERN_BYTES.match(line)
+        if match is not None:
+            date, identifier = match.groups()
+            dates[identifier.decode("utf-8")].append(date.decode("ascii"))
+
+    results = {}
+    for identifier, strings in dates.items():
+        epochs = analytics.parse_log_dates(strings)
+        days = analytics.day_numbers(epochs)
+        kept_days, counts = np.unique(days[analytics.keep_mask(epochs)], return_counts=True)
+        results[identifier] = ChunkResult(
+            int(epochs[0]),
+            int(days[0]),
+            int(epochs[-1]),
+            dict(zip(kept_days.tolist(), counts.tolist()))
+        )
+    return results
+
+
+def merge_chunks(chunks: List[Dict[str, ChunkResult]]) -> Dict[str, Dict[int, int]]:
+    """Merge one log's chunk results, in file order."""
+    interval = analytics.INTERVAL_MIN * 60
+    totals: Dict[str, Dict[int, int]] = collections.defaultdict(collections.Counter)
+    last: Dict[str, int] = {}
+
+    for chunk in chunks:
+        for identifier, result in chunk.items():
+            totals[identifier].update(result.counts)
+            previous = last.get(identifier)
+            if previous is not None and abs(result.first - previous) <= interval:
+                # The chunk counted its first entry, the whole log would not.
+                totals[identifier][result.first_day] -= 1
+            last[identifier] = result.last
+
+    return totals
+
+
+def aggregate(pattern: str, identifiers: Optional[List[str]] = None,
+              jobs: Optional[int] = None,
+              chunk_size: int = CHUNK_SIZE) -> Dict[Tuple[str, str], Dict[int, int]]:
+    """Return {(user, identifier): {day number: sessions}}."""
+    paths = find_logs(pattern)
+    tasks = [chunk for path in paths for chunk in split_chunks(path, chunk_size)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(parse_chunk, tasks, chunksize=4))
+
+    per_log = collections.defaultdict(list)
+    for (path, _, _), result in zip(tasks, results):
+        per_log[path].append(result)
+
+    merged = {}
+    for path, chunks in per_log.items():
+        user = user_name(path, pattern)
+        for identifier, days in merge_chunks(chunks).items():
+            if identifiers and identifier not in identifiers:
+                continue
+            counts = merged.setdefault((user, identifier), collections.Counter())
+            counts.update({day: n for day, n in days.items() if n})
+    return merged
+
+
+def show(merged: Dict[Tuple[str, str], Dict[int, int]]):
+    print("user,identifier,day,sessions")
+    for (user, identifier), days in sorted(merged.items()):
+        for day in sorted(days):
+            date = np.datetime64(day, 'D')
+            print(f"{user},{identifier},{date},{days[day]}")
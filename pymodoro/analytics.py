@@ -0,0 +1,129 @@
+"""
+Vectorized log analytics.
+
+Log dates are held as int64 arrays of naive epoch seconds (local wall
+time counted from 1970-01-01), so calendar days are plain floor
+divisions and match `datetime.date()` of the naive log dates exactly.
+
+"""
+from typing import List, Optional
+
+import datetime
+import time
+
+import numpy as np
+
+INTERVAL_MIN = 20
+HOUR_LIMIT = 7
+
+DAY_SECONDS = 24 * 3600
+LOG_DATE_WIDTH = len("01/01/00 - 00:00:00")
+
+
+def to_epoch(dates: List[datetime.datetime]) -> np.ndarray:
+    """Convert naive datetimes to naive epoch seconds."""
+    return np.array(dates, dtype="datetime64[s]").astype(np.int64)
+
+
+def from_epoch(epochs: np.ndarray) -> List[datetime.datetime]:
+    return epochs.astype("datetime64[s]").tolist()
+
+
+def parse_log_dates(strings: List[str]) -> np.ndarray:
+    """
+    Parse zero-padded DATE_FORMAT_LOG strings ("%d/%m/%y - %H:%M:%S")
+    to naive epoch seconds without going through strptime.
+    """
+    raw = np.array(strings, dtype=f"S{LOG_DATE_WIDTH}")
+    digits = raw.view(np.uint8).reshape(-1, LOG_DATE_WIDTH).astype(np.int64)
+    digits -= ord("0")
+
+    def field(i):
+        return digits[:, i] * 10 + digits[:, i + 1]
+
+    year = field(6)
+    # Same pivot as strptime's %y.
+    year = np.where(year < 69, year + 2000, year + 1900)
+    days = (
+        (year - 1970).astype("datetime64[Y]")
+        + (field(3) - 1).astype("timedelta64[M]")
+    ).astype("datetime64[D]") + (field(0) - 1).astype("timedelta64[D]")
+
+    return (
+        days.astype(np.int64) * DAY_SECONDS
+        + field(11) * 3600 + field(14) * 60 + field(17)
+    )
+
+
+def keep_mask(epochs: np.ndarray, interval_min: int = INTERVAL_MIN) -> np.ndarray:
+    """Drop entries closer than `interval_min` minutes to the previous one."""
+    keep = np.ones(len(epochs), dtype=bool)
+    keep[1:] = np.abs(np.diff(epochs)) > interval_min * 60
+    return keep
+
+
+def day_numbers(epochs: np.ndarray, hour_limit: int = HOUR_LIMIT) -> np.ndarray:
+    """Days since epoch, with days starting at `hour_limit` o'clock."""
+    return (epochs - hour_limit * 3600) // DAY_SECONDS
+
+
+def day_number(moment: datetime.datetime) -> int:
+    return (moment.date() - datetime.date(1970, 1, 1)).days
+
+
+def count_per_day(epochs: np.ndarray, first_day: int, n_days: int,
+                  start: Optional[int] = None,
+                  interval_min: int = INTERVAL_MIN,
+                  hour_limit: int = HOUR_LIMIT) -> np.ndarray:
+    """
+    Deduplicated entry counts of the `n_days` days from day number
+    `first_day`, the same counts `check_entries_day` returns as lists.
+    Entries before the `start` epoch only take part in the dedup.
+    """
+    keep = keep_mask(epochs, interval_min)
+    if start is not None:
+        keep &= epochs >= start
+    days = day_numbers(epochs[keep], hour_limit) - first_day
+    days = days[(days >= 0) & (days < n_days)]
+    return np.bincount(days, minlength=n_days)
+
+
+def benchmark(n: int = 1_000_000, past_days: int = 2):
+    from . import session_control
+
+    now = datetime.datetime.now().replace(microsecond=0)
+    rng = np.random.default_rng(0)
+    # About ten minutes between entries, so the dedup has work to do.
+    gaps = rng.exponential(INTERVAL_MIN * 30, n).astype(np.int64) + 1
+    epochs = to_epoch([now])[0] - np.cumsum(gaps)[::-1]
+    dates = from_epoch(epochs)
+    strings = [d.strftime(session_control.DATE_FORMAT_LOG) for d in dates]
+
+    t = time.perf_counter()
+    parsed = [datetime.datetime.strptime(s, session_control.DATE_FORMAT_LOG)
+              for s in strings]
+    print(f"strptime: {time.perf_counter() - t:.3f}s")
+
+    t = time.perf_counter()
+    parsed_epochs = parse_log_dates(strings)
+    print(f"parse_log_dates: {time.perf_counter() - t:.3f}s")
+    assert (parsed_epochs == to_epoch(parsed)).all()
+
+    t = time.perf_counter()
+    expected = [
+        len(session_control.check_entries_day(
+            dates, now - datetime.timedelta(hours=24 * day), Verbose=0))
+        for day in range(past_days, -1, -1)
+    ]
+    print(f"check_entries_day loop: {time.perf_counter() - t:.3f}s")
+
+    t = time.perf_counter()
+    counts = count_per_day(parsed_epochs, day_number(now) - past_days, past_days + 1)
+    print(f"count_per_day: {time.perf_counter() - t:.3f}s")
+
+    assert counts.tolist() == expected, (counts, expected)
+    print(f"{n} entries, counts per day: {expected}")
+
+
+if __name__ == "__main__":
+    benchmark()
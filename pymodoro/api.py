@@ -0,0 +1,169 @@
+"""
+In-process session control API.
+
+Functions act on the session file and history of a Config and return
+values instead of printing, so tools can control sessions without
+spawning `pymodoro_ctrl`. The ctrl and selector entry points are thin
+wrappers around them. `config` defaults to the user config,
+read without command line arguments.
+
+"""
+from typing import List, NamedTuple, Optional
+
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from . import analytics, configuration, history, journal, routine_control, session_control
+from . import clock as _clock
+
+
+class Status(NamedTuple):
+    ID: str
+    seconds_left: int
+    paused: bool
+
+
+def get_config(config=None):
+    return config or configuration.Config(args=False)
+
+
+def create(identifier: str, config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> bool:
+    """Start a session unless one is running; returns whether it started."""
+    return session_control.create_session(get_config(config), identifier, clock)
+
+
+def status(config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> Optional[Status]:
+    """The current session, or None if there is none."""
+    config = get_config(config)
+    if not os.path.isfile(config.session_file):
+        return None
+    session = session_control.Session(config.session_file, clock)
+    seconds_left = session.get_seconds_left()
+    if seconds_left is None:
+        return None
+    return Status(session.ID, seconds_left, session.is_paused)
+
+
+def toggle_pause(config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> Optional[bool]:
+    """Pause or resume the session; returns whether it is now paused."""
+    config = get_config(config)
+    if not os.path.isfile(config.session_file):
+        return None
+    session = session_control.Session(config.session_file, clock)
+    if not session.add_event(clock.now()):
+        return None
+    return not session.is_paused
+
+
+def pause(config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> bool:
+    """Pause the running session; returns whether it was paused now."""
+    current = status(config, clock)
+    if current is None or current.paused:
+        return False
+    return toggle_pause(config, clock) is True
+
+
+def resume(config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> bool:
+    """Resume the paused session; returns whether it was resumed now."""
+    current = status(config, clock)
+    if current is None or not current.paused:
+        return False
+    return toggle_pause(config, clock) is False
+
+
+def delete(config=None, clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> bool:
+    """Abort the session; returns whether there was one."""
+    config = get_config(config)
+    if not journal.remove(config.session_file):
+        return False
+    session_control.log(config.log_path, "Session aborted.", clock.now())
+    return True
+
+
+def log_entry(identifier: str, date: Optional[datetime.datetime] = None, config=None):
+    """Record a completed session in the history."""
+    date = date or datetime.datetime.now().replace(microsecond=0)
+    history.open_store(get_config(config)).append(date, identifier)
+
+
+def day_counts(identifier: str, past_days: int = 7, now: Optional[datetime.datetime] = None,
+               config=None) -> List[int]:
+    """
+    Deduplicated session counts of the days from `past_days` ago to
+    today, as `check_entries_day` counts them.
+    """
+    now = now or datetime.datetime.now()
+    today = analytics.day_number(now)
+    first = now.date() - datetime.timedelta(days=past_days)
+    since = datetime.datetime.combine(first, datetime.time(analytics.HOUR_LIMIT))
+
+    counts = history.open_store(get_config(config)).count_per_day(identifier, since)
+    return [counts.get(day, 0) for day in range(today - past_days, today + 1)]
+
+
+def expected_sessions(now: Optional[datetime.datetime] = None, config=None) -> float:
+    """Sessions the routine expects done by `now`."""
+    routine = routine_control.Routine.from_config(get_config(config))
+    return routine_control.expected_sessions(now or datetime.datetime.now(), routine)
+
+
+def adherence(identifier: str, past_days: int = 90, step_minutes: int = 10,
+              now: Optional[datetime.datetime] = None,
+              config=None) -> routine_control.Adherence:
+    """The routine against the sessions of the last `past_days` days."""
+    config = get_config(config)
+    routine = routine_control.Routine.from_config(config)
+    now = now or datetime.datetime.now()
+
+    end = int(analytics.to_epoch([now])[0]) + 1
+    today = int(routine_control.routine_days(end - 1, routine))
+    start = (today - past_days) * routine_control.DAY_SECONDS + routine.day_start_hour * 3600
+
+    # Also read the entries the first ones are deduplicated against.
+    lookback = start - analytics.INTERVAL_MIN * 60
+    since = analytics.from_epoch(np.array([lookback]))[0]
+    entries = history.open_store(config).range(identifier, since)
+    kept = entries[analytics.keep_mask(entries)]
+    return routine_control.adherence(kept, start, end, step_minutes * 60, routine)
+
+
+def benchmark(n: int = 200):
+    """Time API calls against spawning the ctrl CLI, in a scratch directory."""
+    import subprocess
+    import sys
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = configuration.Config(args=False)
+        config.session_file = os.path.join(directory, "session")
+        config.log_path = os.path.join(directory, "log")
+        config.history_backend = "text"
+
+        t = time.perf_counter()
+        for _ in range(n):
+            create("research", config)
+            pause(config)
+            resume(config)
+            delete(config)
+        elapsed = time.perf_counter() - t
+        print(f"API create/pause/resume/delete: {elapsed / n * 1000:.2f} ms per cycle")
+
+        t = time.perf_counter()
+        for _ in range(n):
+            day_counts("research", 7, config=config)
+        print(f"API day_counts: {(time.perf_counter() - t) / n * 1000:.2f} ms")
+
+        t = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "pymodoro.session_control", "check", "research"],
+            stdout=subprocess.DEVNULL,
+            check=True
+        )
+        print(f"Spawned pymodoro_ctrl check: {(time.perf_counter() - t) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
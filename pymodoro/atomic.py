@@ -0,0 +1,52 @@
+"""
+Atomic file replacement.
+
+Files other processes read while they are rewritten (the session
+journal, the log, output files, caches and snapshots) are written to a
+temporary file next to them, then renamed over them: readers see the
+old or the new contents, never a partial write. Only the standard
+library is imported here.
+
+"""
+from typing import IO, Any, Iterator, Optional
+
+import contextlib
+import json
+import os
+
+
+@contextlib.contextmanager
+def writer(path: str, mode: str = 'w', fsync: bool = False, **kwargs) -> Iterator[IO]:
+    """
+    Yield a file whose contents replace `path` when the block exits;
+    on an error `path` is left untouched. Extra arguments go to `open`.
+    """
+    if 'b' not in mode:
+        kwargs.setdefault("encoding", "utf-8")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path: str, data: Any) -> None:
+    with writer(path) as f:
+        json.dump(data, f)
+
+
+def read_json(path: str) -> Optional[Any]:
+    """The JSON contents of `path`, None if it is missing or corrupt."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
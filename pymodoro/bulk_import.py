@@ -0,0 +1,226 @@
+"""
+Bulk import of sessions into the pomodoro log.
+
+Entries are read from CSV (`timestamp,identifier` rows) or ICS
+(VEVENT start and summary) input, validated and sorted, then merged
+into the log in a single pass that keeps it in time order. The merged
+log is written in large buffered batches to a temporary file which
+replaces the log under its journal lock.
+
+"""
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import csv
+import datetime
+import os
+import sys
+
+from . import atomic, journal
+from .session_control import DATE_FORMAT_LOG, format_log_line
+
+BATCH_SIZE = 4096
+
+Entry = Tuple[datetime.datetime, str]
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """Accept ISO 8601 or log formatted timestamps, as naive local time."""
+    value = value.strip()
+    try:
+        date = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            date = datetime.datetime.strptime(value, DATE_FORMAT_LOG)
+        except ValueError:
+            raise ValueError(f"'{value}' is neither an ISO 8601 nor a log date.") from None
+
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date.replace(microsecond=0)
+
+
+def parse_end_timestamp(value: str) -> datetime.datetime:
+    """Like `parse_timestamp`, but a bare date means the end of that day."""
+    try:
+        day = datetime.date.fromisoformat(value.strip())
+    except ValueError:
+        return parse_timestamp(value)
+    return datetime.datetime.combine(day, datetime.time(23, 59, 59))
+
+
+def read_csv(f: TextIO, identifier: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (line number, [timestamp, identifier]) rows."""
+    reader = csv.reader(f)
+    for row in reader:
+        if not row or row[0].startswith("#") or row[0].strip() == "timestamp":
+            continue
+        if identifier is not None:
+            row = [row[0], identifier]
+        yield reader.line_num, row
+
+
+def read_ics(f: TextIO, identifier: Optional[str] = None) -> Iterator[Tuple[int, List[str]]]:
+    """Yield (line number, [timestamp, identifier]) for each VEVENT."""
+    event: Optional[dict] = None
+    start_line = 0
+    previous = None
+
+    def unfolded():
+        nonlocal previous
+        for n, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if line.startswith((" ", "\t")) and previous is not None:
+                previous = (previous[0], previous[1] + line[1:])
+                continue
+            if previous is not None:
+                yield previous
+            previous = (n, line)
+        if previous is not None:
+            yield previous
+
+    for n, line in unfolded():
+        name, _, value = line.partition(":")
+        name = name.split(";")[0].upper()
+        if name == "BEGIN" and value == "VEVENT":
+            event = {}
+            start_line = n
+        elif event is None:
+            continue
+        elif name == "END" and value == "VEVENT":
+            yield start_line, [
+                event.get("DTSTART", ""),
+                identifier if identifier is not None else event.get("SUMMARY", "")
+            ]
+            event = None
+        elif name in ("DTSTART", "SUMMARY"):
+            event[name] = value
+
+
+def validate(rows: Iterable[Tuple[int, List[str]]]) -> Tuple[List[Entry], List[str]]:
+    """Return the valid entries, sorted, and the errors found."""
+    entries: List[Entry] = []
+    errors: List[str] = []
+    for n, row in rows:
+        if len(row) < 2:
+            errors.append(f"{n}: expected a timestamp and an identifier.")
+            continue
+
+        timestamp, identifier = row[0], row[1].strip()
+        if not identifier or "\n" in identifier:
+            errors.append(f"{n}: bad identifier {identifier!r}.")
+            continue
+        try:
+            date = parse_timestamp(timestamp)
+        except ValueError:
+            errors.append(f"{n}: bad timestamp {timestamp!r}.")
+            continue
+        entries.append((date, identifier))
+
+    entries.sort()
+    return entries, errors
+
+
+def format_entry(date: datetime.datetime, identifier: str) -> str:
+    return format_log_line(date, f"{identifier} session.")
+
+
+def sort_key(line: str) -> Optional[str]:
+    """Sortable key of a log line's date, None for undated lines."""
+    if len(line) < 21 or line[0] != "[" or line[20] != "]":
+        return None
+    date = line[1:20]
+    dd, mm, yy = date[0:2], date[3:5], date[6:8]
+    if not (dd + mm + yy).isdigit():
+        return None
+    century = "20" if int(yy) < 69 else "19"
+    return century + yy + mm + dd + date[11:19]
+
+
+def merge_lines(existing: Iterable[str], new: Iterable[str]) -> Iterator[str]:
+    """
+    Merge sorted new log lines into the existing ones, keeping the
+    existing order and dropping lines already present at that time.
+    """
+    new = iter(new)
+    pending = next(new, None)
+
+    key = None
+    seen = set()
+
+    def take(line):
+        nonlocal key, seen
+        line_key = sort_key(line)
+        if line_key is not None and line_key != key:
+            key = line_key
+            seen = set()
+        if line in seen:
+            return False
+        seen.add(line)
+        return True
+
+    for line in existing:
+        line_key = sort_key(line)
+        if line_key is not None:
+            while pending is not None and sort_key(pending) < line_key:
+                if take(pending):
+                    yield pending
+                pending = next(new, None)
+        take(line)
+        yield line
+
+    while pending is not None:
+        if take(pending):
+            yield pending
+        pending = next(new, None)
+
+
+def read_log(log_path: str) -> Iterator[str]:
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, encoding="utf-8") as f:
+        yield from f
+
+
+def merge_entries(log_path: str, entries: List[Entry]) -> int:
+    """Merge sorted entries into the log; returns the lines written."""
+    new = (format_entry(date, identifier) for date, identifier in entries)
+
+    written = 0
+    with journal.locked(log_path):
+        with atomic.writer(log_path, fsync=True, buffering=1 << 20) as out:
+            batch = []
+            for line in merge_lines(read_log(log_path), new):
+                if not line.endswith("\n"):
+                    line += "\n"
+                batch.append(line)
+                if len(batch) >= BATCH_SIZE:
+                    out.writelines(batch)
+                    written += len(batch)
+                    batch = []
+            out.writelines(batch)
+            written += len(batch)
+
+    return written
+
+
+def import_file(log_path: str, path: str, fmt: Optional[str] = None,
+                identifier: Optional[str] = None, store=None) -> Tuple[int, List[str]]:
+    """
+    Import sessions from a CSV or ICS file ("-" for stdin), into the
+    log or a `history` store.
+    """
+    if fmt is None:
+        fmt = "ics" if path.lower().endswith(".ics") else "csv"
+    reader = {"csv": read_csv, "ics": read_ics}[fmt]
+
+    if path == "-":
+        entries, errors = validate(reader(sys.stdin, identifier))
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            entries, errors = validate(reader(f, identifier))
+
+    if entries and store is not None:
+        store.extend(entries)
+    elif entries:
+        merge_entries(log_path, entries)
+    return len(entries), errors
@@ -0,0 +1,54 @@
+"""
+Clock abstraction.
+
+Everything that reads the time or sleeps goes through a Clock, so a
+VirtualClock can drive sessions, the status loop and the routine
+curve through hours of simulated time in a fraction of a second.
+
+"""
+import datetime
+import time
+
+
+class Clock():
+    """The system clock."""
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """A clock that only moves when slept on or advanced."""
+
+    def __init__(self, start: datetime.datetime):
+        self._time = start.timestamp()
+        self._monotonic = 0.0
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self._time)
+
+    def time(self) -> float:
+        return self._time
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self._time += seconds
+            self._monotonic += seconds
+
+
+SYSTEM_CLOCK = Clock()
@@ -1,19 +1,31 @@
 import os
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
 import configparser
 
+from . import outputs
+
+
+def positive_int(value: str) -> int:
+    """Argument type of the intervals, which must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"{value} is not a positive number of seconds.")
+    return number
+
 
 class Config(object):
     """Load config from defaults, file and arguments."""
 
     def __init__(self, args=True):
 
+        self._args = args
         self.load_defaults()
         self.load_user_data()
         self.load_from_file()
         if args:
             self.load_from_args()
+        self.load_output_profiles()
 
     def load_defaults(self):
 
@@ -24,10 +36,14 @@ class Config(object):
         self.auto_hide = False
 
         self.log_path = os.path.expanduser("~/.pomodoro_log")
+        # Session history storage, 'text' (the log) or 'sqlite'.
+        self.history_backend = 'text'
+        self.history_db_path = os.path.expanduser('~/.local/share/pymodoro/history.sqlite3')
         self.shortOutput = True
 
         # Cosmetics
         self.colorize_output = True
+        self.markup = 'xmobar'
         self.progress_bar_size = 8
 
         # Times
@@ -36,6 +52,10 @@ class Config(object):
         self.break_duration_in_minutes = 5
         self.break_duration_in_seconds = self.break_duration_in_minutes * 60
         self.update_interval_in_seconds = 1
+        self.show_jitter_stats = False
+        # Report memory, file descriptor and child process growth.
+        self.monitor_resources = False
+        self.monitor_interval_in_seconds = 3600
 
         # Progress Bar
         self.total_number_of_marks = self.session_duration_in_minutes
@@ -61,9 +81,21 @@ class Config(object):
         # Run until SIGINT or any other interrupts by default.
         self.enable_only_one_line = False
 
+        # Publish the latest output for the `pymodoro -o` fast path.
+        self.publish_snapshot = True
+
+        # Only write output when it changes, repeating it every
+        # heartbeat interval (0 disables the heartbeat).
+        self.output_changes_only = False
+        self.heartbeat_interval_in_seconds = 0
+
         # Files for hooks (TODO make configurable)
         self.start_pomodoro_hook_file = os.path.expanduser("~/.pymodoro/hooks/start-pomodoro.py")
         self.complete_pomodoro_hook_file = os.path.expanduser("~/.pymodoro/hooks/complete-pomodoro.py")
+        # With 'plugin', also import the modules of the plugin
+        # directory in process, see `plugins`.
+        self.hook_mode = 'process'
+        self.plugins_dir = os.path.expanduser("~/.pymodoro/plugins")
 
         self.Color = {
             "session": "ff1010",
@@ -108,6 +140,19 @@ class Config(object):
         self._file = os.path.join(self._dir, 'config')
         self._load_config_file()
 
+    def load_output_profiles(self):
+        """
+        Extra outputs rendered from the same state, one per
+        [Output NAME] section of the config file.
+        """
+        self.output_profiles = []
+        for section in self._parser.sections():
+            if section.startswith('Output '):
+                name = section[len('Output '):]
+                self.output_profiles.append(
+                    outputs.OutputProfile.from_section(name, self, self._parser, section)
+                )
+
     def _get_script_path(self):
         module_path = os.path.realpath(__file__)
         return os.path.dirname(module_path)
@@ -123,6 +168,16 @@ class Config(object):
             self.auto_hide = self._parser.getboolean('General', 'autohide')
             # Set 'oneline' to True if you want pymodoro to output only one line and exit.
             self.enable_only_one_line = self._parser.getboolean('General', 'oneline')
+            self.output_changes_only = self._parser.getboolean(
+                'General', 'changes_only', fallback=self.output_changes_only)
+            self.heartbeat_interval_in_seconds = self._parser.getint(
+                'General', 'heartbeat', fallback=self.heartbeat_interval_in_seconds)
+            self.history_backend = self._parser.get(
+                'General', 'history', fallback=self.history_backend)
+            self.history_db_path = os.path.expanduser(self._parser.get(
+                'General', 'history_db', fallback=self.history_db_path))
+            self.hook_mode = self._parser.get(
+                'General', 'hooks', fallback=self.hook_mode)
 
             self.pomodoro_prefix = self._config_get_quoted_string('Labels', 'pomodoro_prefix')
             self.pomodoro_suffix = self._config_get_quoted_string('Labels', 'pomodoro_suffix')
@@ -149,6 +204,10 @@ class Config(object):
         self._parser.set('General', 'autohide', str(self.auto_hide).lower())
         self._config_set_quoted_string('General', 'session', self.session_file)
         self._parser.set('General', 'oneline', str(self.enable_only_one_line).lower())
+        self._parser.set('General', 'changes_only', str(self.output_changes_only).lower())
+        self._parser.set('General', 'heartbeat', str(self.heartbeat_interval_in_seconds))
+        self._parser.set('General', 'history', self.history_backend)
+        self._parser.set('General', 'hooks', self.hook_mode)
 
         self._parser.add_section('Labels')
         self._config_set_quoted_string('Labels', 'pomodoro_prefix', self.pomodoro_prefix)
@@ -202,7 +261,9 @@ class Config(object):
         arg_parser.add_argument('-n', '--no-break', action='store_true', help='No break sound.', dest='no_break')
         arg_parser.add_argument('-ah', '--auto-hide', action='store_true', help='Hide output when session file is removed.', dest='auto_hide')
 
-        arg_parser.add_argument('-i', '--interval', action='store', type=int, help='Update interval in seconds (default: 1).', metavar='DURATION', dest='update_interval_in_seconds')
+        arg_parser.add_argument('-i', '--interval', action='store', type=positive_int, help='Update interval in seconds (default: 1).', metavar='DURATION', dest='update_interval_in_seconds')
+        arg_parser.add_argument('-js', '--jitter-stats', action='store_true', help='Print tick jitter statistics on exit.', dest='show_jitter_stats')
+        arg_parser.add_argument('-rm', '--resource-monitor', action='store', nargs='?', type=positive_int, const=3600, help='Report resource growth every DURATION seconds (default: 3600).', metavar='DURATION', dest='monitor_interval_in_seconds')
         arg_parser.add_argument('-l', '--length', action='store', type=int, help='Bar length in characters (default: 10).', metavar='CHARACTERS', dest='total_number_of_marks')
 
         arg_parser.add_argument('-p', '--pomodoro', action='store', help='Pomodoro full mark characters (default: #).', metavar='CHARACTER', dest='session_full_mark_character')
@@ -223,6 +284,12 @@ class Config(object):
 
         arg_parser.add_argument('-o', '--one-line', action='store_true', help='Print one line of output and quit.', dest='oneline')
 
+        arg_parser.add_argument('-m', '--markup', action='store', choices=list(outputs.MARKUPS), help='Color markup of the output (default: xmobar).', dest='markup')
+        arg_parser.add_argument('-c', '--changes-only', action='store_true', help='Only print output when it changes.', dest='changes_only')
+        arg_parser.add_argument('-hb', '--heartbeat', action='store', type=int, help='With --changes-only, repeat unchanged output every DURATION seconds.', metavar='DURATION', dest='heartbeat_interval_in_seconds')
+
+        arg_parser.add_argument('-ph', '--plugin-hooks', action='store_true', help='Import the modules of ~/.pymodoro/plugins as in-process hooks.', dest='plugin_hooks')
+
         arg_parser.add_argument('-onc', action='store_true', dest='shortOutput')
         args = arg_parser.parse_args()
 
@@ -238,6 +305,13 @@ class Config(object):
                 self.break_duration_in_seconds = args.break_duration * 60
         if args.update_interval_in_seconds:
             self.update_interval_in_seconds = args.update_interval_in_seconds
+        if args.show_jitter_stats:
+            self.show_jitter_stats = True
+        if args.plugin_hooks:
+            self.hook_mode = 'plugin'
+        if args.monitor_interval_in_seconds:
+            self.monitor_resources = True
+            self.monitor_interval_in_seconds = args.monitor_interval_in_seconds
         if args.total_number_of_marks:
             self.total_number_of_marks = args.total_number_of_marks
         if args.session_full_mark_character:
@@ -275,6 +349,13 @@ class Config(object):
         if args.pomodoro_suffix:
             self.pomodoro_suffix = args.pomodoro_suffix
 
+        if args.markup:
+            self.markup = args.markup
+        if args.changes_only:
+            self.output_changes_only = True
+        if args.heartbeat_interval_in_seconds is not None:
+            self.heartbeat_interval_in_seconds = args.heartbeat_interval_in_seconds
+
         self.shortOutput = args.shortOutput
 
         if args.oneline:
@@ -0,0 +1,172 @@
+"""
+Streaming export of the pomodoro log.
+
+Session entries are yielded one at a time with their derived day and
+whether the INTERVAL_MIN dedup drops them, so CSV and JSONL exports
+run in constant memory. Identifier and time range filters are checked
+on the raw line before any date is parsed. NumPy dumps are built from
+compact array buffers.
+
+"""
+from typing import IO, Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import array
+import csv
+import datetime
+import json
+
+import numpy as np
+
+from . import analytics
+from .bulk_import import sort_key
+from .session_control import DATE_FORMAT, DATE_FORMAT_LOG, ENTRY_PATTERN
+
+
+class Entry(NamedTuple):
+    timestamp: datetime.datetime
+    identifier: str
+    day: datetime.date
+    duplicate: bool
+
+
+def in_window(time: str, start: str, end: str) -> bool:
+    """Whether a HH:MM:SS time is in [start, end), which may wrap midnight."""
+    if start <= end:
+        return start <= time < end
+    return time >= start or time < end
+
+
+def iter_entries(log_path: str,
+                 identifiers: Optional[List[str]] = None,
+                 since: Optional[datetime.datetime] = None,
+                 until: Optional[datetime.datetime] = None,
+                 identifier_match: Optional[Callable[[str], bool]] = None,
+                 time_window: Optional[Tuple[datetime.time, datetime.time]] = None,
+                 weekdays: Optional[Set[int]] = None,
+                 interval_min: int = analytics.INTERVAL_MIN,
+                 hour_limit: int = analytics.HOUR_LIMIT) -> Iterator[Entry]:
+    """
+    Yield the session entries of the log, oldest first.
+
+    `duplicate` is set for entries closer than `interval_min` to the
+    previous entry with the same identifier, which `check_entries_day`
+    does not count. Identifiers, the date range and the time of day
+    window are checked on the raw line, weekdays once it is parsed.
+    `until` is inclusive. The whole log is scanned: it is not
+    guaranteed to be in time order (edits, clock changes).
+    """
+    since_key = sort_key(f"[{since.strftime(DATE_FORMAT_LOG)}]") if since else None
+    until_key = sort_key(f"[{until.strftime(DATE_FORMAT_LOG)}]") if until else None
+    wanted = set(identifiers) if identifiers else None
+    if time_window is not None:
+        window_start, window_end = (t.strftime(DATE_FORMAT) for t in time_window)
+    interval = datetime.timedelta(minutes=interval_min)
+    shift = datetime.timedelta(hours=hour_limit)
+
+    # Previous entry of each identifier: raw date string, parsed lazily.
+    previous = {}
+
+    with open(log_path, encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith(" session.\n"):
+                continue
+            if wanted is not None and line[22:-10] not in wanted:
+                continue
+
+            match = ENTRY_PATTERN.match(line)
+            if match is None:
+                continue
+            date_string, identifier = match.groups()
+            if identifier_match is not None and not identifier_match(identifier):
+                continue
+
+            key = sort_key(line)
+            if key is None:
+                # Not a zero-padded log date: cannot be placed in time.
+                continue
+            last = previous.get(identifier)
+            previous[identifier] = date_string
+            if since_key is not None and key < since_key:
+                continue
+            if until_key is not None and key > until_key:
+                continue
+            if time_window is not None and not in_window(date_string[11:], window_start, window_end):
+                continue
+
+            timestamp = datetime.datetime.strptime(date_string, DATE_FORMAT_LOG)
+            if weekdays is not None and timestamp.weekday() not in weekdays:
+                continue
+
+            duplicate = False
+            if last is not None:
+                last = datetime.datetime.strptime(last, DATE_FORMAT_LOG)
+                duplicate = abs(timestamp - last) <= interval
+
+            yield Entry(timestamp, identifier, (timestamp - shift).date(), duplicate)
+
+
+def write_csv(entries: Iterator[Entry], out: IO[str]):
+    writer = csv.writer(out)
+    writer.writerow(Entry._fields)
+    for entry in entries:
+        writer.writerow([
+            entry.timestamp.isoformat(),
+            entry.identifier,
+            entry.day.isoformat(),
+            int(entry.duplicate)
+        ])
+
+
+def write_jsonl(entries: Iterator[Entry], out: IO[str]):
+    for entry in entries:
+        out.write(json.dumps({
+            "timestamp": entry.timestamp.isoformat(),
+            "identifier": entry.identifier,
+            "day": entry.day.isoformat(),
+            "duplicate": entry.duplicate
+        }) + "\n")
+
+
+def to_columns(entries: Iterator[Entry]) -> dict:
+    """
+    Columnar arrays: naive epoch seconds, days since epoch, duplicate
+    flags and identifier codes indexing the `identifiers` array.
+    """
+    timestamps = array.array('q')
+    duplicates = array.array('b')
+    codes = array.array('l')
+    identifiers = {}
+
+    for entry in entries:
+        timestamps.append(int((entry.timestamp - datetime.datetime(1970, 1, 1)).total_seconds()))
+        duplicates.append(entry.duplicate)
+        codes.append(identifiers.setdefault(entry.identifier, len(identifiers)))
+
+    timestamp = np.frombuffer(timestamps, dtype=np.int64)
+    return {
+        "timestamp": timestamp,
+        "day": analytics.day_numbers(timestamp),
+        "duplicate": np.frombuffer(duplicates, dtype=np.int8).astype(bool),
+        "identifier": np.array(codes, dtype=np.int32),
+        "identifiers": np.array(list(identifiers), dtype=str)
+    }
+
+
+def write_npz(entries: Iterator[Entry], path: str):
+    np.savez(path, **to_columns(entries))
+
+
+def write_npy(entries: Iterator[Entry], path: str):
+    """Write a structured array with one record per entry."""
+    columns = to_columns(entries)
+    width = max([len(i) for i in columns["identifiers"]], default=1)
+    records = np.empty(len(columns["timestamp"]), dtype=[
+        ("timestamp", np.int64),
+        ("identifier", f"U{width}"),
+        ("day", np.int64),
+        ("duplicate", bool)
+    ])
+    for name in ("timestamp", "day", "duplicate"):
+        records[name] = columns[name]
+    records["identifier"] = columns["identifiers"][columns["identifier"]]
+    np.save(path, records)
@@ -0,0 +1,153 @@
+"""
+Incremental session heatmap.
+
+Each day is a row of ten-minute cells marking the half hour from every
+kept (deduplicated) session start, as `plot_days` draws them. Rows are
+cached bit-packed per identifier, with the per-day session counts, the
+last entry covered and the number of entries of its day. A refresh
+only reads the history from that day on and folds in the entries
+logged after the last covered one. If the log was replaced (an import
+into the past rewrites it) or the entries of that day changed, the
+cache is rebuilt from the whole history.
+
+"""
+from typing import Dict, Optional
+
+import datetime
+import hashlib
+import os
+
+import numpy as np
+
+from . import analytics, atomic, snapshot
+
+CELLS = 24 * 6
+# Cells marked from a session start, a pomodoro and its break.
+MARK_CELLS = 3
+
+
+def cache_path(config, identifier: str) -> str:
+    source = config.history_db_path if config.history_backend == "sqlite" else config.log_path
+    key = hashlib.sha1(f"{source}\0{identifier}".encode("utf-8")).hexdigest()
+    return os.path.join(snapshot.SNAPSHOT_DIR, f"heatmap-{key}.npz")
+
+
+def start_cells(epochs: np.ndarray) -> np.ndarray:
+    """First cell of each session, rounding the minutes like `round`."""
+    seconds = epochs % analytics.DAY_SECONDS
+    minutes = seconds % 3600 // 60
+    return seconds // 3600 * 6 + np.round(minutes / 10).astype(np.int64)
+
+
+class Heatmap():
+    def __init__(self, path: str):
+        self.path = path
+        self.clear()
+        self.load()
+
+    def clear(self):
+        self.rows: Dict[int, np.ndarray] = {}
+        self.counts: Dict[int, int] = {}
+        # Last entry covered and the number of entries of its day up to
+        # it, and the inode of the log they were read from.
+        self.last: Optional[int] = None
+        self.covered = 0
+        self.inode: Optional[int] = None
+
+    def load(self):
+        try:
+            with np.load(self.path) as data:
+                days = data["days"].tolist()
+                rows = np.unpackbits(data["rows"], axis=1, count=CELLS).astype(bool)
+                self.rows = dict(zip(days, rows))
+                self.counts = dict(zip(days, data["counts"].tolist()))
+                self.last = int(data["last"]) if data["last"] >= 0 else None
+                self.covered = int(data["covered"])
+                self.inode = int(data["inode"]) if data["inode"] >= 0 else None
+        except (OSError, KeyError, ValueError):
+            self.clear()
+
+    def save(self):
+        days = sorted(self.rows)
+        rows = np.array([self.rows[day] for day in days], dtype=bool).reshape(-1, CELLS)
+
+        with atomic.writer(self.path, 'wb') as f:
+            np.savez(
+                f,
+                days=np.array(days, dtype=np.int64),
+                rows=np.packbits(rows, axis=1),
+                counts=np.array([self.counts[day] for day in days], dtype=np.int64),
+                last=np.int64(-1 if self.last is None else self.last),
+                covered=np.int64(self.covered),
+                inode=np.int64(-1 if self.inode is None else self.inode)
+            )
+
+    def start(self) -> Optional[int]:
+        """Epoch of the start of the last covered day."""
+        if self.last is None:
+            return None
+        day = int(analytics.day_numbers(np.array([self.last]))[0])
+        return day * analytics.DAY_SECONDS + analytics.HOUR_LIMIT * 3600
+
+    def since(self) -> Optional[datetime.datetime]:
+        """Where the history is read from by `refresh`."""
+        start = self.start()
+        return None if start is None else analytics.from_epoch(np.array([start]))[0]
+
+    def refresh(self, store, identifier: str, log_path: str) -> "Heatmap":
+        """Fold in the entries of `identifier` logged since the last refresh."""
+        try:
+            inode = os.stat(log_path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode != self.inode:
+            self.clear()
+            self.inode = inode
+
+        if not self.update(store.range(identifier, self.since())):
+            self.clear()
+            self.inode = inode
+            self.update(store.range(identifier))
+        return self
+
+    def update(self, entries: np.ndarray) -> bool:
+        """
+        Fold in the sorted entry epochs, read from `since()` on, logged
+        after the last covered one. Returns False, changing nothing, if
+        the entries already covered changed.
+        """
+        old = 0 if self.last is None else int(np.searchsorted(entries, self.last, side="right"))
+        if old != self.covered:
+            return False
+        if old == len(entries):
+            return True
+
+        # The dedup of the first new entry looks at the one before it.
+        context = entries[max(old - 1, 0):]
+        kept = analytics.keep_mask(context)
+        if old:
+            context, kept = context[1:], kept[1:]
+        self.mark(context[kept])
+
+        self.last = int(entries[-1])
+        self.covered = len(entries) - int(np.searchsorted(entries, self.start()))
+        self.save()
+        return True
+
+    def mark(self, epochs: np.ndarray):
+        days = analytics.day_numbers(epochs)
+        for day, start in zip(days.tolist(), start_cells(epochs).tolist()):
+            row = self.rows.get(day)
+            if row is None:
+                row = self.rows[day] = np.zeros(CELLS, dtype=bool)
+            row[start:start + MARK_CELLS] = True
+            self.counts[day] = self.counts.get(day, 0) + 1
+
+    def matrix(self, first_day: int, last_day: int) -> np.ndarray:
+        """Rows of days [first_day, last_day], empty days included."""
+        matrix = np.zeros((last_day - first_day + 1, CELLS))
+        for day in range(first_day, last_day + 1):
+            row = self.rows.get(day)
+            if row is not None:
+                matrix[day - first_day] = row
+        return matrix
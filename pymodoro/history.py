@@ -0,0 +1,345 @@
+"""
+Session history storage.
+
+A HistoryStore appends session entries and answers range and per-day
+count queries. TextStore is the regex-scanned log file. SqliteStore
+indexes the same log in a stdlib sqlite3 database (WAL mode) keyed on
+(identifier, timestamp), so ranges and counts are index lookups: the
+log stays the history every other reader (stats, query, export,
+signal) uses, entries are still written to it, and the database
+follows it, indexing the lines appended since its last sync or the
+whole log once it was replaced. Timestamps are naive epoch seconds,
+see `analytics`.
+
+Stores are cached per process by `open_store`, which keeps the SQLite
+connection open in long-running processes.
+
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import abc
+import collections
+import datetime
+import os
+import sqlite3
+
+import numpy as np
+
+from . import analytics, bulk_import, journal
+from .session_control import ENTRY_PATTERN_BYTES
+
+# Range scans cached per text store.
+CACHE_SIZE = 32
+BACKENDS = ["text", "sqlite"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    identifier TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (identifier, timestamp)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS log_position (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    inode INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+"""
+
+# Deduplicated per-day counts, the same dedup as `analytics.keep_mask`:
+# an entry counts unless the previous one is at most `interval` away.
+COUNT_PER_DAY = """
+SELECT (timestamp - :offset) / 86400 AS day, COUNT(*) FROM (
+    SELECT timestamp, LAG(timestamp) OVER (ORDER BY timestamp) AS previous
+    FROM sessions
+    WHERE identifier = :identifier AND timestamp >= :lookback AND timestamp < :until
+)
+WHERE timestamp >= :since AND (previous IS NULL OR timestamp - previous > :interval)
+GROUP BY day
+"""
+
+_stores: Dict[Tuple[str, str, str], "HistoryStore"] = {}
+
+
+def naive_epoch(date: Optional[datetime.datetime], default: int) -> int:
+    """Naive epoch seconds (see `analytics`) of `date`, or `default` for None."""
+    if date is None:
+        return default
+    return int(analytics.to_epoch([date])[0])
+
+
+def append_entry(log_path: str, date: datetime.datetime, identifier: str):
+    with journal.locked(log_path), open(log_path, 'a', encoding="utf-8") as f:
+        f.write(bulk_import.format_entry(date, identifier))
+
+
+def read_entries(log_path: str, offset: int = 0) -> Tuple[List[Tuple[str, int]], int]:
+    """
+    (identifier, timestamp) of the entries in the complete lines from
+    `offset`, and the offset after the last of them.
+    """
+    names = []
+    dates = []
+    with open(log_path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            match = ENTRY_PATTERN_BYTES.match(line)
+            if match is not None:
+                dates.append(match.group(1))
+                names.append(match.group(2).decode("utf-8"))
+
+    if not dates:
+        return [], offset
+    return list(zip(names, analytics.parse_log_dates(dates).tolist())), offset
+
+
+class HistoryStore(abc.ABC):
+    def append(self, date: datetime.datetime, identifier: str):
+        self.extend([(date, identifier)])
+
+    @abc.abstractmethod
+    def extend(self, entries: List[Tuple[datetime.datetime, str]]):
+        """Add entries to the history."""
+
+    @abc.abstractmethod
+    def range(self, identifier: str,
+              since: Optional[datetime.datetime] = None,
+              until: Optional[datetime.datetime] = None) -> np.ndarray:
+        """Sorted entry timestamps of `identifier` in [since, until)."""
+
+    def count_per_day(self, identifier: str,
+                      since: Optional[datetime.datetime] = None,
+                      until: Optional[datetime.datetime] = None,
+                      interval_min: int = analytics.INTERVAL_MIN,
+                      hour_limit: int = analytics.HOUR_LIMIT) -> Dict[int, int]:
+        """
+        Deduplicated session count per day number in [since, until),
+        days starting at `hour_limit` o'clock.
+        """
+        lookback = None
+        if since is not None:
+            lookback = since - datetime.timedelta(minutes=interval_min)
+
+        epochs = self.range(identifier, lookback, until)
+        if not len(epochs):
+            return {}
+        first_day, last_day = analytics.day_numbers(epochs[[0, -1]], hour_limit).tolist()
+        counts = analytics.count_per_day(
+            epochs,
+            first_day,
+            last_day - first_day + 1,
+            naive_epoch(since, 0),
+            interval_min,
+            hour_limit
+        )
+        return {first_day + day: int(counts[day]) for day in np.flatnonzero(counts).tolist()}
+
+    def close(self):
+        pass
+
+
+class CachedRange(NamedTuple):
+    fingerprint: Tuple[int, int, int]
+    # End of the last complete line scanned.
+    offset: int
+    since: int
+    epochs: np.ndarray
+
+
+class TextStore(HistoryStore):
+    """
+    The plain text log. Range scans are kept in an LRU cache keyed on
+    (identifier, until), valid for the log (inode, size, mtime) they
+    were read at and for any later `since`. When the log only grew
+    since, the appended tail is scanned and folded into the entry.
+    """
+
+    def __init__(self, log_path: str, cache_size: int = CACHE_SIZE):
+        self.log_path = log_path
+        self.cache_size = cache_size
+        self.cache: "collections.OrderedDict[Tuple[str, int], CachedRange]" = collections.OrderedDict()
+
+    def append(self, date, identifier):
+        append_entry(self.log_path, date, identifier)
+
+    def extend(self, entries):
+        """Merge entries into the log, keeping it in time order."""
+        bulk_import.merge_entries(self.log_path, sorted(entries))
+
+    def scan(self, identifier: str, offset: int = 0) -> Tuple[np.ndarray, int]:
+        """
+        Sorted entry timestamps of `identifier` in the complete lines
+        from `offset`, and the offset after the last of them.
+        """
+        name = identifier.encode("utf-8")
+        dates = []
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                match = ENTRY_PATTERN_BYTES.match(line)
+                if match is not None and match.group(2) == name:
+                    dates.append(match.group(1))
+
+        if not dates:
+            return np.zeros(0, dtype=np.int64), offset
+        return np.sort(analytics.parse_log_dates(dates)), offset
+
+    def range(self, identifier, since=None, until=None):
+        start = naive_epoch(since, 0)
+        end = naive_epoch(until, np.iinfo(np.int64).max)
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=np.int64)
+        fingerprint = (st.st_ino, st.st_size, st.st_mtime_ns)
+
+        key = (identifier, end)
+        cached = self.cache.get(key)
+        if cached is not None and cached.since > start:
+            cached = None
+        if cached is not None and cached.fingerprint != fingerprint:
+            if cached.fingerprint[0] == st.st_ino and st.st_size > cached.fingerprint[1]:
+                # Only appended to: fold in the new tail.
+                tail, offset = self.scan(identifier, cached.offset)
+                tail = tail[(tail >= cached.since) & (tail < end)]
+                epochs = np.sort(np.concatenate([cached.epochs, tail]))
+                cached = CachedRange(fingerprint, offset, cached.since, epochs)
+            else:
+                cached = None
+
+        if cached is None:
+            epochs, offset = self.scan(identifier)
+            epochs = epochs[(epochs >= start) & (epochs < end)]
+            cached = CachedRange(fingerprint, offset, start, epochs)
+
+        self.cache[key] = cached
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return cached.epochs[np.searchsorted(cached.epochs, start):]
+
+
+class SqliteStore(HistoryStore):
+    """The log entries indexed in SQLite on (identifier, timestamp)."""
+
+    def __init__(self, db_path: str, log_path: str):
+        self.db_path = db_path
+        self.log_path = log_path
+        self._connection: Optional[sqlite3.Connection] = None
+        # Log (inode, size) indexed by the last sync of this process.
+        self.synced: Optional[Tuple[int, int]] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.db_path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def sync(self) -> int:
+        """
+        Index the log lines appended since the last sync, or the whole
+        log if it was replaced; returns the entries added.
+        """
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return 0
+        if self.synced == (st.st_ino, st.st_size):
+            return 0
+
+        connection = self.connection
+        inode, offset = connection.execute(
+            "SELECT inode, offset FROM log_position"
+        ).fetchone() or (None, 0)
+        replaced = inode != st.st_ino or st.st_size < offset
+        if replaced:
+            offset = 0
+
+        added = 0
+        if replaced or offset < st.st_size:
+            entries, offset = read_entries(self.log_path, offset)
+            with connection:
+                if replaced:
+                    connection.execute("DELETE FROM sessions")
+                added = connection.executemany(
+                    "INSERT OR IGNORE INTO sessions (identifier, timestamp) VALUES (?, ?)",
+                    entries
+                ).rowcount
+                connection.execute(
+                    "INSERT OR REPLACE INTO log_position (id, inode, offset) VALUES (0, ?, ?)",
+                    (st.st_ino, offset)
+                )
+        self.synced = (st.st_ino, offset)
+        return added
+
+    def append(self, date, identifier):
+        append_entry(self.log_path, date, identifier)
+        self.sync()
+
+    def extend(self, entries):
+        """Merge entries into the log, then index it again."""
+        bulk_import.merge_entries(self.log_path, sorted(entries))
+        self.sync()
+
+    def range(self, identifier, since=None, until=None):
+        self.sync()
+        rows = self.connection.execute(
+            "SELECT timestamp FROM sessions "
+            "WHERE identifier = ? AND timestamp >= ? AND timestamp < ? "
+            "ORDER BY timestamp",
+            (identifier, naive_epoch(since, 0), naive_epoch(until, np.iinfo(np.int64).max))
+        )
+        return np.array([timestamp for timestamp, in rows], dtype=np.int64)
+
+    def count_per_day(self, identifier, since=None, until=None,
+                      interval_min=analytics.INTERVAL_MIN,
+                      hour_limit=analytics.HOUR_LIMIT):
+        self.sync()
+        start = naive_epoch(since, 0)
+        rows = self.connection.execute(COUNT_PER_DAY, {
+            "identifier": identifier,
+            "since": start,
+            "lookback": start - interval_min * 60,
+            "until": naive_epoch(until, np.iinfo(np.int64).max),
+            "interval": interval_min * 60,
+            "offset": hour_limit * 3600
+        })
+        return dict(rows.fetchall())
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self.synced = None
+
+
+def open_store(config, backend: Optional[str] = None) -> HistoryStore:
+    """Return the process-wide store of the configured backend."""
+    backend = backend or config.history_backend
+    path = config.history_db_path if backend == "sqlite" else config.log_path
+
+    key = (backend, path, config.log_path)
+    if key not in _stores:
+        if backend == "sqlite":
+            _stores[key] = SqliteStore(path, config.log_path)
+        elif backend == "text":
+            _stores[key] = TextStore(path)
+        else:
+            raise ValueError(f"Unknown history backend '{backend}'.")
+    return _stores[key]
+
+
+def migrate(config) -> int:
+    """Index the text log in the SQLite store; returns entries added."""
+    return open_store(config, "sqlite").sync()
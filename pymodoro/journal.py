@@ -0,0 +1,137 @@
+"""
+Append-only session journal.
+
+The session file is a small journal: a header record (ID, creation
+date, and durations with the identifier, one per line) followed by one
+event record per line. Writers serialize on an fcntl lock held on a sidecar
+`<journal>.lock` file; headers are replaced atomically through a
+temporary file and rename, events are appended with a single
+O_APPEND write. Readers never lock: they only consume complete lines
+and detect a replaced journal by its inode and header, as a new
+journal often gets the inode of a removed one back.
+
+"""
+from typing import Iterator, List, Optional, Tuple
+
+import contextlib
+import fcntl
+import os
+
+from . import atomic
+
+HEADER_SIZE = 3
+# Bytes read to find the header records.
+HEADER_BYTES = 4096
+
+
+@contextlib.contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Hold the exclusive writer lock of the journal at `path`."""
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _encode(records: List[str]) -> bytes:
+    return "".join(record + "\n" for record in records).encode("utf-8")
+
+
+def write(path: str, records: List[str]) -> None:
+    """Atomically replace the journal with `records` (header first)."""
+    with locked(path), atomic.writer(path, 'wb', fsync=True) as f:
+        f.write(_encode(records))
+
+
+def append(path: str, record: str) -> bool:
+    """
+    Append one event record to an existing journal.
+
+    Returns False when there is no journal to append to.
+    """
+    with locked(path):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        except FileNotFoundError:
+            return False
+        try:
+            os.write(fd, _encode([record]))
+        finally:
+            os.close(fd)
+    return True
+
+
+def remove(path: str) -> bool:
+    """Delete the journal; returns False if it did not exist."""
+    with locked(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def read_header(fd: int) -> bytes:
+    """The complete records among the first HEADER_SIZE of the journal."""
+    lines = os.pread(fd, HEADER_BYTES, 0).splitlines(keepends=True)[:HEADER_SIZE]
+    return b"".join(line for line in lines if line.endswith(b"\n"))
+
+
+class JournalReader():
+    """Incrementally read the records appended since the last call."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.inode: Optional[int] = None
+        self.offset = 0
+        # Header records seen so far, to recognize a journal re-created
+        # with the same inode. Also valid for a reader resumed at an offset.
+        self.header = b""
+
+    def read(self) -> Tuple[bool, List[str]]:
+        """
+        Return (reset, records).
+
+        When `reset` is True the journal was created or replaced and
+        `records` holds it from the start, header included; otherwise
+        `records` only holds the events appended since the last read.
+        A journal that disappeared yields (True, []) once.
+        """
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            reset = self.inode is not None
+            self.inode = None
+            self.offset = 0
+            self.header = b""
+            return reset, []
+
+        try:
+            st = os.fstat(fd)
+            reset = (
+                st.st_ino != self.inode
+                or st.st_size < self.offset
+                or os.pread(fd, len(self.header), 0) != self.header
+            )
+            if reset:
+                self.inode = st.st_ino
+                self.offset = 0
+                self.header = b""
+            elif st.st_size == self.offset:
+                return False, []
+
+            os.lseek(fd, self.offset, os.SEEK_SET)
+            data = os.read(fd, st.st_size - self.offset)
+            if self.header.count(b"\n") < HEADER_SIZE:
+                self.header = read_header(fd)
+        finally:
+            os.close(fd)
+
+        # Leave a trailing partial record for the next read.
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        records = data[:end].decode("utf-8").splitlines()
+        return reset, records
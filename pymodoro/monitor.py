@@ -0,0 +1,110 @@
+"""
+Resource monitor for long-running processes.
+
+Samples traced Python memory (tracemalloc), open file descriptors and
+child processes, and reports their growth since the first sample,
+with the allocation sites that grew the most. Descriptor and child
+counts read /proc and are None where it is not available.
+
+"""
+from typing import List, NamedTuple, Optional
+
+import os
+import tracemalloc
+
+# Frames kept per traced allocation.
+TRACE_FRAMES = 1
+
+
+class Sample(NamedTuple):
+    memory: int
+    peak: int
+    fds: Optional[int]
+    children: Optional[int]
+    zombies: Optional[int]
+
+
+def count_fds() -> Optional[int]:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def count_children() -> Optional[List[str]]:
+    """States of the child processes of this process."""
+    pid = str(os.getpid())
+    try:
+        names = os.listdir("/proc")
+    except OSError:
+        return None
+
+    states = []
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="utf-8") as f:
+                # The command name may contain spaces: split after it.
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if fields[1] == pid:
+            states.append(fields[0])
+    return states
+
+
+class ResourceMonitor():
+    def __init__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        self.first: Optional[Sample] = None
+        self.first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.last: Optional[Sample] = None
+
+    def sample(self) -> Sample:
+        memory, peak = tracemalloc.get_traced_memory()
+        children = count_children()
+        sample = Sample(
+            memory,
+            peak,
+            count_fds(),
+            None if children is None else len(children),
+            None if children is None else children.count("Z")
+        )
+        if self.first is None:
+            self.first = sample
+            self.first_snapshot = tracemalloc.take_snapshot()
+        self.last = sample
+        return sample
+
+    def growth(self) -> Sample:
+        """Growth of the last sample over the first one."""
+        def diff(last, first):
+            if last is None or first is None:
+                return None
+            return last - first
+
+        return Sample(*(diff(last, first) for last, first in zip(self.last, self.first)))
+
+    def report(self, top: int = 3) -> str:
+        last = self.last
+        growth = self.growth()
+        line = (
+            f"memory: {last.memory / 1024:.1f} KiB ({growth.memory / 1024:+.1f}), "
+            f"peak: {last.peak / 1024:.1f} KiB"
+        )
+        if last.fds is not None:
+            line += f", fds: {last.fds} ({growth.fds:+d})"
+        if last.children is not None:
+            line += f", children: {last.children} ({growth.children:+d}), zombies: {last.zombies}"
+
+        lines = [line]
+        stats = tracemalloc.take_snapshot().compare_to(self.first_snapshot, "lineno")
+        for stat in stats[:top]:
+            if stat.size_diff > 0:
+                lines.append(f"  {stat}")
+        return "\n".join(lines)
+
+    def stop(self):
+        tracemalloc.stop()
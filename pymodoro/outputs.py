@@ -0,0 +1,192 @@
+"""
+Output profiles and sinks.
+
+A profile describes how one consumer wants the output rendered (bar
+characters, colors, markup) and where it goes. Profiles are read from
+`[Output NAME]` sections of the config file, e.g.
+
+    [Output dzen]
+    path = "~/.cache/pymodoro/dzen.fifo"
+    fifo = true
+    markup = dzen
+
+so a single pymodoro process can feed xmobar, dzen and a terminal
+segment from the same state. Sinks never block the main loop: a FIFO
+without a reader is skipped and a line a slow reader cannot take is
+retried on the next tick.
+
+"""
+from typing import Dict, Optional, Tuple, Union
+
+import errno
+import os
+import stat
+
+from . import atomic
+
+Color = Union[str, Tuple[str, str, str]]
+
+
+def _hex(Color: Color) -> str:
+    try:
+        return '%s%s%s' % Color
+    except TypeError:
+        return Color
+
+
+def xmobar(color: str, content: str) -> str:
+    return f"<fc=#{color}>{content}</fc>"
+
+
+def dzen(color: str, content: str) -> str:
+    return f"^fg(#{color}){content}^fg()"
+
+
+def plain(color: str, content: str) -> str:
+    return content
+
+
+def ansi(color: str, content: str) -> str:
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return f"\x1b[38;2;{r};{g};{b}m{content}\x1b[0m"
+
+
+MARKUPS = {
+    "xmobar": xmobar,
+    "dzen": dzen,
+    "plain": plain,
+    "ansi": ansi
+}
+
+
+def colorize(markup: str, Color: Color, content: str) -> str:
+    return MARKUPS[markup](_hex(Color), content)
+
+
+class OutputProfile():
+    """Rendering settings of one output, defaulting to the main config."""
+
+    # Rendering attributes shared with Config.
+    FIELDS = [
+        "markup",
+        "colorize_output",
+        "shortOutput",
+        "progress_bar_size",
+        "left_to_right",
+        "session_full_mark_character",
+        "break_full_mark_character",
+        "empty_mark_character"
+    ]
+
+    def __init__(self, name: str, config, path: str, fifo: bool = False):
+        self.name = name
+        self.path = os.path.expanduser(path)
+        self.fifo = fifo
+        for field in self.FIELDS:
+            setattr(self, field, getattr(config, field))
+        self.Color: Dict[str, str] = dict(config.Color)
+
+        # Progress shown while paused, kept per profile.
+        self.last_progress = ""
+
+    @classmethod
+    def from_section(cls, name: str, config, parser, section: str) -> "OutputProfile":
+        def get_string(option):
+            return parser.get(section, option).strip('"')
+
+        def get_boolean(option):
+            return parser.getboolean(section, option)
+
+        def get_int(option):
+            return parser.getint(section, option)
+
+        profile = cls(
+            name,
+            config,
+            get_string('path'),
+            parser.getboolean(section, 'fifo', fallback=False)
+        )
+
+        options = {
+            'markup': ('markup', get_string),
+            'colorize': ('colorize_output', get_boolean),
+            'short': ('shortOutput', get_boolean),
+            'bar_size': ('progress_bar_size', get_int),
+            'left_to_right': ('left_to_right', get_boolean),
+            'session_character': ('session_full_mark_character', get_string),
+            'break_character': ('break_full_mark_character', get_string),
+            'empty_character': ('empty_mark_character', get_string)
+        }
+        for option, (field, getter) in options.items():
+            if parser.has_option(section, option):
+                setattr(profile, field, getter(option))
+
+        for state in profile.Color:
+            option = f"{state}_color"
+            if parser.has_option(section, option):
+                profile.Color[state] = get_string(option).lstrip('#')
+
+        if profile.markup not in MARKUPS:
+            raise ValueError(f"Unknown markup '{profile.markup}' in [{section}].")
+
+        return profile
+
+
+class OutputSink():
+    """Write lines to a FIFO or a file without blocking."""
+
+    def __init__(self, path: str, fifo: bool = False):
+        self.path = path
+        self.fd: Optional[int] = None
+        self.last_line: Optional[str] = None
+
+        if fifo and not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            os.mkfifo(path)
+
+    def is_fifo(self) -> bool:
+        try:
+            return stat.S_ISFIFO(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            return False
+
+    def write(self, line: str):
+        if self.fd is not None or self.is_fifo():
+            self._write_fifo(line)
+        elif line != self.last_line:
+            self._write_file(line)
+
+    def _write_fifo(self, line: str):
+        if self.fd is None:
+            try:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno in (errno.ENXIO, errno.ENOENT):
+                    # No reader yet.
+                    return
+                raise
+            # A new reader gets the current line right away.
+            self.last_line = None
+
+        if line == self.last_line:
+            return
+
+        try:
+            # Lines are shorter than PIPE_BUF, so writes are all or nothing.
+            os.write(self.fd, line.encode("utf-8"))
+        except BlockingIOError:
+            return
+        except BrokenPipeError:
+            self.close()
+            return
+        self.last_line = line
+
+    def _write_file(self, line: str):
+        with atomic.writer(self.path) as f:
+            f.write(line)
+        self.last_line = line
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,176 @@
+"""
+In-process hook plugins.
+
+In plugin mode (`hooks = plugin`), the `.py` modules of the plugin
+directory, ~/.pymodoro/plugins, are imported into the running pymodoro
+and called on each transition; the executable hooks still run as
+before. A module is imported once and reloaded when its
+mtime changes. It subscribes to events from a `register(registry)`
+function, or by defining `on_<event>` functions:
+
+    def register(registry):
+        registry.subscribe("complete", lambda transition: ...)
+
+Events are "transition" (every state change), "start" (a pomodoro
+starts) and "complete" (a pomodoro ends); callbacks receive a
+Transition. Modules defining neither are skipped without being
+imported; module top level code runs on each (re)load only. A module
+or callback that fails is reported on stderr and skipped.
+
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import ast
+import importlib.util
+import os
+import re
+import sys
+
+EVENTS = ["transition", "start", "complete"]
+ENTRY_POINTS = {"register"} | {f"on_{event}" for event in EVENTS}
+
+
+class Transition(NamedTuple):
+    old_state: str
+    new_state: str
+    # The random session ID and the identifier it was created for
+    # (None for sessions created by older versions).
+    session_id: str
+    identifier: Optional[str]
+    # Epoch seconds of the transition and of the session start.
+    time: float
+    started: float
+    seconds_left: Optional[int]
+
+
+Callback = Callable[[Transition], None]
+
+
+class Registry():
+    """Collects the subscriptions of one plugin module."""
+
+    def __init__(self):
+        self.subscriptions: List[Tuple[str, Callback]] = []
+
+    def subscribe(self, event: str, callback: Callback):
+        if event not in EVENTS:
+            raise ValueError(f"Unknown hook event '{event}'.")
+        self.subscriptions.append((event, callback))
+
+
+class Plugin(NamedTuple):
+    mtime: int
+    subscriptions: List[Tuple[str, Callback]]
+
+
+def defines_entry_point(path: str) -> bool:
+    """Whether the module defines an entry point, read without running it."""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), path)
+    return any(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in ENTRY_POINTS
+        for node in tree.body
+    )
+
+
+def module_name(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return "pymodoro_hook_" + re.sub(r"\W", "_", stem)
+
+
+class PluginHooks():
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.plugins: Dict[str, Plugin] = {}
+
+    def refresh(self):
+        """Import new and changed modules, and drop removed ones."""
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith(".py"))
+        except OSError:
+            names = []
+
+        plugins = {}
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            plugin = self.plugins.get(path)
+            if plugin is None or plugin.mtime != mtime:
+                plugin = self.load(path, mtime)
+            plugins[path] = plugin
+        self.plugins = plugins
+
+    def load(self, path: str, mtime: int) -> Plugin:
+        registry = Registry()
+        name = module_name(path)
+        try:
+            if not defines_entry_point(path):
+                return Plugin(mtime, [])
+            spec = importlib.util.spec_from_file_location(name, path)
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+
+            register = getattr(module, "register", None)
+            if register is not None:
+                register(registry)
+            else:
+                for event in EVENTS:
+                    callback = getattr(module, f"on_{event}", None)
+                    if callback is not None:
+                        registry.subscribe(event, callback)
+        except Exception as e:
+            sys.modules.pop(name, None)
+            sys.stderr.write(f"Hook plugin {path} failed to load: {e!r}\n")
+            return Plugin(mtime, [])
+
+        if not registry.subscriptions:
+            sys.stderr.write(f"Hook plugin {path} subscribes to no event.\n")
+        return Plugin(mtime, registry.subscriptions)
+
+    def dispatch(self, events: List[str], transition: Transition) -> int:
+        """Call the subscribers of `events`; returns how many were called."""
+        self.refresh()
+        called = 0
+        for path, plugin in self.plugins.items():
+            for event, callback in plugin.subscriptions:
+                if event not in events:
+                    continue
+                called += 1
+                try:
+                    callback(transition)
+                except Exception as e:
+                    sys.stderr.write(f"Hook plugin {path} failed on '{event}': {e!r}\n")
+        return called
+
+
+def benchmark(n: int = 50):
+    """Time a trivial hook run as a process against dispatched in-process."""
+    import subprocess
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "complete-pomodoro.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"#!{sys.executable}\ndef on_complete(transition):\n    pass\n")
+        os.chmod(path, 0o755)
+
+        t = time.perf_counter()
+        for _ in range(n):
+            subprocess.check_call(path)
+        print(f"Process hook: {(time.perf_counter() - t) / n * 1000:.2f} ms per transition")
+
+        hooks = PluginHooks(directory)
+        transition = Transition("ACTIVE", "BREAK", "ABC123", "research", time.time(), time.time(), 0)
+        t = time.perf_counter()
+        for _ in range(n):
+            hooks.dispatch(["transition", "complete"], transition)
+        print(f"Plugin hook: {(time.perf_counter() - t) / n * 1000:.3f} ms per transition")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -4,16 +4,37 @@
 #          Dominik Mayer <dominik.mayer@gmail.com>
 # Prerequisite
 #  - aplay to play a sound of your choice
-from typing import List
+from typing import List, NamedTuple, Optional
 
+import configparser
 import os
+import signal
 import sys
-import time
 import subprocess
+import threading
 
 from subprocess import Popen
+from functools import partial
 
-from . import configuration, session_control, color_gradient
+from . import configuration, session_control, color_gradient, snapshot, outputs, scheduler, monitor, plugins
+from . import clock as _clock
+
+# Seconds between checks of the config file for changes.
+CONFIG_POLL_INTERVAL = 2
+
+
+class Tick(NamedTuple):
+    """
+    The session as seen by one loop iteration, computed once so every
+    step of the tick sees the same time. `next_state` is the state
+    displayed; it differs from `state` on the tick a transition fires.
+    """
+    now: float
+    seconds_left: Optional[int]
+    break_elapsed: int
+    paused: bool
+    state: str
+    next_state: str
 
 
 class Pymodoro(object):
@@ -26,79 +47,263 @@ class Pymodoro(object):
 
     last_progress = ""
 
-    def __init__(self):
-        self.config = configuration.Config()
+    def __init__(self, config=None, clock=_clock.SYSTEM_CLOCK):
+        self.config = config or configuration.Config()
+        self.clock = clock
         self.session_file = os.path.expanduser(self.config.session_file)
 
-        self.session = session_control.Session(self.session_file)
+        self.session = session_control.Session(self.session_file, clock)
         self.set_durations(self.session)
+        self.state = self.IDLE_STATE
         self.running = True
+        self.scheduler = scheduler.TickScheduler(self.config.update_interval_in_seconds, clock)
 
         # cache last time the session file was touched
         # to know if the session file contents should be re-read
         self.last_start_time = 0
 
+        self.sinks = {
+            profile.name: outputs.OutputSink(profile.path, profile.fifo)
+            for profile in self.config.output_profiles
+        }
+
+        # Last line written, for the changes-only output mode.
+        self.last_output = None
+        self.last_output_time = 0.0
+
+        # Last snapshot published for `pymodoro -o`.
+        self.argv = sys.argv[1:]
+        self.snapshot_path = snapshot.snapshot_path(self.argv)
+        self.snapshot_output = None
+        self.snapshot_files = None
+        self.snapshot_until = None
+
+        # Config parsed by the watcher thread, swapped in on the next tick.
+        self.pending_config = None
+        self.config_lock = threading.Lock()
+        self.config_changed = threading.Event()
+
+        # Helper processes (notifications) not reaped yet.
+        self.children: List[Popen] = []
+
+        # Opt-in resource monitor, see `monitor_resources`.
+        self.monitor = None
+        self.next_monitor_report = 0.0
+
+        self.plugins = self.make_plugin_hooks(self.config)
+
+    def make_plugin_hooks(self, config) -> Optional[plugins.PluginHooks]:
+        if config.hook_mode != 'plugin':
+            return None
+        return plugins.PluginHooks(config.plugins_dir)
+
     def run(self):
         """ Start main loop."""
+        self.start_config_watcher()
+        if self.config.monitor_resources:
+            self.monitor = monitor.ResourceMonitor()
+            self.monitor.sample()
+            self.next_monitor_report = self.clock.monotonic() + self.config.monitor_interval_in_seconds
+        try:
+            while self.running:
+                self.tick()
+                if self.config.enable_only_one_line:
+                    break
+                else:
+                    self.wait()
+        finally:
+            if self.config.show_jitter_stats:
+                sys.stderr.write(self.scheduler.stats.report() + '\n')
+            if self.monitor is not None:
+                self.monitor.sample()
+                sys.stderr.write(self.monitor.report() + '\n')
+
+    def tick(self) -> Tick:
+        """One iteration of the main loop, without the wait."""
+        self.apply_pending_config()
+        tick = self.make_tick()
+        self.update_state(tick)
+        self.print_output(tick)
+        self.tick_sound(tick)
+        self.reap_children()
+        self.check_resources()
+        return tick
+
+    def check_resources(self):
+        """Report resource growth every monitor interval."""
+        if self.monitor is None or self.clock.monotonic() < self.next_monitor_report:
+            return
+        self.monitor.sample()
+        sys.stderr.write(self.monitor.report() + '\n')
+        self.next_monitor_report += self.config.monitor_interval_in_seconds
+
+    def start_config_watcher(self):
+        """Reload the config when its file changes, or on SIGHUP."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.config_changed.set())
+        threading.Thread(target=self.watch_config, daemon=True).start()
+
+    def watch_config(self):
+        """Parse the changed config off the tick path."""
+        files = snapshot.fingerprints([self.config._file])
         while self.running:
-            self.update_state()
-            self.print_output()
-            self.tick_sound()
-            if self.config.enable_only_one_line:
-                break
-            else:
-                self.wait()
+            requested = self.config_changed.wait(CONFIG_POLL_INTERVAL)
+            self.config_changed.clear()
+
+            current = snapshot.fingerprints([self.config._file])
+            if not requested and current == files:
+                continue
+            files = current
+
+            try:
+                config = configuration.Config(args=self.config._args)
+            except (configparser.Error, ValueError) as e:
+                sys.stderr.write(f"Keeping the current config, reload failed: {e}\n")
+                continue
+            with self.config_lock:
+                self.pending_config = config
+
+    def apply_pending_config(self):
+        """
+        Swap in a reloaded config, keeping the state and rebuilding only
+        what depends on the changed fields.
+        """
+        with self.config_lock:
+            config, self.pending_config = self.pending_config, None
+        if config is None:
+            return
 
-    def update_state(self):
+        previous = self.config
+        self.config = config
+
+        session_file = os.path.expanduser(config.session_file)
+        if session_file != self.session_file:
+            self.session_file = session_file
+            self.session = session_control.Session(session_file, self.clock)
+        self.set_session_duration(self.session.WORK)
+        self.set_break_duration(self.session.REST)
+
+        if config.update_interval_in_seconds != previous.update_interval_in_seconds:
+            self.scheduler.interval = config.update_interval_in_seconds
+            self.scheduler.align()
+
+        # Keep the sinks and paused progress of the unchanged outputs.
+        profiles = {profile.name: profile for profile in previous.output_profiles}
+        sinks = {}
+        for profile in config.output_profiles:
+            old = profiles.get(profile.name)
+            if old is not None:
+                profile.last_progress = old.last_progress
+            if old is not None and (old.path, old.fifo) == (profile.path, profile.fifo):
+                sinks[profile.name] = self.sinks[profile.name]
+            else:
+                sinks[profile.name] = outputs.OutputSink(profile.path, profile.fifo)
+        for name, sink in self.sinks.items():
+            if sinks.get(name) is not sink:
+                sink.close()
+        self.sinks = sinks
+
+        if (config.hook_mode, config.plugins_dir) != (previous.hook_mode, previous.plugins_dir):
+            self.plugins = self.make_plugin_hooks(config)
+
+        # Rendering may have changed: publish the next output.
+        self.snapshot_output = None
+
+    def make_tick(self) -> Tick:
+        """Read the clock and the session once for this loop iteration."""
+        now = self.clock.time()
+        seconds_left = self.session.get_seconds_left(now)
+        paused = self.session.is_paused
+
+        if paused:
+            state = next_state = self.PAUSED_STATE
+        else:
+            state = self.get_current_state(seconds_left)
+            next_state = self.get_next_state(seconds_left)
+
+        return Tick(
+            now,
+            seconds_left,
+            self.get_break_elapsed(seconds_left),
+            paused,
+            state,
+            next_state
+        )
+
+    def update_state(self, tick: Optional[Tick] = None):
         """ Update the current state determined by timings."""
-        if not hasattr(self, 'state'):
-            self.state = self.IDLE_STATE
-
-        seconds_left = self.session.get_seconds_left()
-        break_duration = self.config.break_duration_in_seconds
-        break_elapsed = self.get_break_elapsed(seconds_left)
+        tick = tick or self.make_tick()
 
-        if self.session.is_paused:
+        if tick.paused:
             self.state = self.PAUSED_STATE
             return
 
+        self.state = current_state = tick.state
+        next_state = tick.next_state
+
+        if next_state is not current_state:
+            self.send_notifications(next_state)
+            self.run_hooks(current_state, next_state, tick)
+            self.state = next_state
+
+    def run_hooks(self, current_state, next_state, tick: Tick):
+        """Execute the hooks of a transition and dispatch it to the plugins."""
+        complete = current_state == self.ACTIVE_STATE and next_state == self.BREAK_STATE
+        start = current_state != self.ACTIVE_STATE and next_state == self.ACTIVE_STATE
+
+        if self.plugins is not None:
+            events = ["transition"]
+            if complete:
+                events.append("complete")
+            if start:
+                events.append("start")
+            self.plugins.dispatch(events, self.make_transition(current_state, next_state, tick))
+
+        if complete and os.path.exists(self.config.complete_pomodoro_hook_file):
+            self.run_hook(self.config.complete_pomodoro_hook_file)
+
+        elif start and os.path.exists(self.config.start_pomodoro_hook_file):
+            self.run_hook(self.config.start_pomodoro_hook_file)
+
+    def make_transition(self, current_state, next_state, tick: Tick) -> plugins.Transition:
+        return plugins.Transition(
+            current_state,
+            next_state,
+            self.session.ID,
+            self.session.IDENTIFIER,
+            tick.now,
+            self.session.CREATION_DATE.timestamp(),
+            tick.seconds_left
+        )
+
+    def get_current_state(self, seconds_left):
+        """Return the state the remaining seconds fall into."""
+        break_duration = self.config.break_duration_in_seconds
+        break_elapsed = self.get_break_elapsed(seconds_left)
+
         if seconds_left is None:
-            self.state = self.IDLE_STATE
+            return self.IDLE_STATE
         elif seconds_left >= 0:
-            self.state = self.ACTIVE_STATE
+            return self.ACTIVE_STATE
         elif break_elapsed <= break_duration:
-            self.state = self.BREAK_STATE
-        else:
-            self.state = self.WAIT_STATE
+            return self.BREAK_STATE
+        return self.WAIT_STATE
 
-        current_state = self.state
+    def get_next_state(self, seconds_left):
+        """Return the state one second ahead, which is the one displayed."""
+        break_duration = self.config.break_duration_in_seconds
+        break_elapsed = self.get_break_elapsed(seconds_left)
 
         if seconds_left is None:
-            next_state = self.IDLE_STATE
+            return self.IDLE_STATE
         elif seconds_left > 1:
-            next_state = self.ACTIVE_STATE
+            return self.ACTIVE_STATE
         elif break_elapsed + 1 < break_duration or seconds_left == 1:
-            next_state = self.BREAK_STATE
-        else:
-            next_state = self.WAIT_STATE
-
-        if next_state is not current_state:
-            self.send_notifications(next_state)
-
-            # Execute hooks
-            if all([
-                    current_state == self.ACTIVE_STATE,
-                    next_state == self.BREAK_STATE,
-                    os.path.exists(self.config.complete_pomodoro_hook_file)
-            ]):
-                subprocess.check_call(self.config.complete_pomodoro_hook_file)
+            return self.BREAK_STATE
+        return self.WAIT_STATE
 
-            elif (current_state != self.ACTIVE_STATE and
-                  next_state == self.ACTIVE_STATE and
-                  os.path.exists(self.config.start_pomodoro_hook_file)):
-                subprocess.check_call(self.config.start_pomodoro_hook_file)
-
-            self.state = next_state
+    def run_hook(self, hook_file):
+        subprocess.check_call(hook_file)
 
     def send_notifications(self, next_state):
         """Send appropriate notifications when leaving a state."""
@@ -122,10 +327,40 @@ class Pymodoro(object):
         if sound:
             self.play_sound(sound)
 
-    def make_output(self):
+    def make_output(self, tick: Optional[Tick] = None):
         """Make output determined by the current state."""
+        tick = tick or self.make_tick()
+        progress, Color = self.render_progress(self.state, tick.seconds_left)
+
+        if self.state != self.PAUSED_STATE:
+            self.last_progress = progress
+
+        return self.format_output(progress, Color)
+
+    def make_profile_output(self, profile, seconds_left):
+        """Make the output of an extra output profile."""
+        progress, Color = self.render_progress(self.state, seconds_left, profile)
+
+        if self.state != self.PAUSED_STATE:
+            profile.last_progress = progress
+
+        return self.format_output(progress, Color, profile)
+
+    def format_output(self, progress, Color, profile=None):
+        profile = profile or self.config
+        if profile.colorize_output:
+            progress = self.show_colored(Color, progress, profile.markup)
+
+        return progress + '\n'
+
+    def render_progress(self, state, seconds_left, profile=None):
+        """
+        Return the progress text and its color for a given state,
+        rendered with the main config or an output profile.
+        """
         auto_hide = self.config.auto_hide
-        seconds_left = self.session.get_seconds_left()
+        last_progress = profile.last_progress if profile else self.last_progress
+        profile = profile or self.config
 
         progress = ""
         timer = ""
@@ -135,23 +370,23 @@ class Pymodoro(object):
             False: self.get_progress_bar
         }
 
-        displayMethod = displayMethods[self.config.shortOutput]
+        displayMethod = partial(displayMethods[profile.shortOutput], profile=profile)
 
         Color = "ffffff"
 
-        if self.state == self.IDLE_STATE and not auto_hide:
+        if state == self.IDLE_STATE and not auto_hide:
             progress = ""
 
-        elif self.state == self.ACTIVE_STATE:
+        elif state == self.ACTIVE_STATE:
             duration = self.config.session_duration_in_seconds
             output_seconds = self.get_output_seconds(seconds_left)
             output_minutes = self.get_minutes(seconds_left)
 
             progress = displayMethod(duration, seconds_left)
             timer = "%02d:%02d" % (output_minutes, output_seconds)
-            Color = self.config.Color["session"]
+            Color = profile.Color["session"]
 
-        elif self.state == self.BREAK_STATE:
+        elif state == self.BREAK_STATE:
             duration = self.config.break_duration_in_seconds
             break_seconds = self.get_break_seconds_left(seconds_left)
             output_seconds = self.get_output_seconds(break_seconds)
@@ -160,9 +395,9 @@ class Pymodoro(object):
             progress = displayMethod(duration, break_seconds)
             timer = "%02d:%02d" % (output_minutes, output_seconds)
 
-            Color = self.config.Color["break"]
+            Color = profile.Color["break"]
 
-        elif self.state == self.WAIT_STATE:
+        elif state == self.WAIT_STATE:
             seconds = -seconds_left
             minutes = self.get_minutes(seconds)
             hours = self.get_hours(seconds)
@@ -181,34 +416,93 @@ class Pymodoro(object):
             else:
                 timer = "Over a week"
 
-        elif self.state == self.PAUSED_STATE:
-            progress = self.last_progress
-            Color = self.config.Color["paused"]
+        elif state == self.PAUSED_STATE:
+            progress = last_progress
+            Color = profile.Color["paused"]
 
         else:
             raise Exception("Unknown state.")
 
-        if self.state != self.PAUSED_STATE:
-            self.last_progress = progress
+        return progress, Color
+
+    def seconds_until_change(self, seconds_left) -> Optional[int]:
+        """
+        Return the seconds until the output may change by itself, or
+        None if only a session file change can alter it.
+        """
+        if self.state not in (self.ACTIVE_STATE, self.BREAK_STATE):
+            return None
+
+        current = self.render_progress(self.state, seconds_left)
+        limit = max(
+            self.config.session_duration_in_seconds,
+            self.config.break_duration_in_seconds
+        )
+        for k in range(1, limit + 2):
+            future = seconds_left - k
+            state = self.get_next_state(future)
+            if state != self.state or self.render_progress(state, future) != current:
+                return k
+        return limit
+
+    def publish_snapshot(self, output, tick: Tick):
+        """Publish the output for `pymodoro -o` until it may change."""
+        now = tick.now
+        files = snapshot.fingerprints([self.session_file, self.config._file])
+        if all([
+                output == self.snapshot_output,
+                files == self.snapshot_files,
+                self.snapshot_until is None or now < self.snapshot_until
+        ]):
+            return
 
-        if self.config.colorize_output:
-            progress = self.show_colored(Color, progress)
+        change_in = self.seconds_until_change(tick.seconds_left)
+        # Whole-second timings: stay on the safe side of the change.
+        valid_until = None if change_in is None else now + change_in - 1
 
-        return progress + '\n'
+        snapshot.write_cache(self.snapshot_path, output, valid_until, files)
+        self.snapshot_output = output
+        self.snapshot_files = files
+        self.snapshot_until = valid_until
+
+    def print_output(self, tick: Optional[Tick] = None):
+        tick = tick or self.make_tick()
+        output = self.make_output(tick)
+
+        if self.should_write(output):
+            self.write_output(output)
+            self.last_output = output
+            self.last_output_time = self.clock.monotonic()
 
-    def print_output(self):
-        sys.stdout.write(self.make_output())
+        # Extra outputs are rendered from the same tick.
+        for profile in self.config.output_profiles:
+            self.sinks[profile.name].write(
+                self.make_profile_output(profile, tick.seconds_left))
+
+        if self.config.publish_snapshot:
+            self.publish_snapshot(output, tick)
+
+    def write_output(self, output):
+        sys.stdout.write(output)
         sys.stdout.flush()
 
+    def should_write(self, output):
+        """In changes-only mode, skip unchanged output between heartbeats."""
+        if not self.config.output_changes_only or output != self.last_output:
+            return True
+
+        heartbeat = self.config.heartbeat_interval_in_seconds
+        return bool(heartbeat) and self.clock.monotonic() - self.last_output_time >= heartbeat
+
     def wait(self):
-        """Wait for the specified interval."""
-        interval = self.config.update_interval_in_seconds
-        time.sleep(interval)
+        """Wait for the next tick of the specified interval."""
+        self.scheduler.wait()
 
-    def tick_sound(self):
+    def tick_sound(self, tick: Optional[Tick] = None):
         """Play the Pomodoro tick sound if enabled."""
         enabled = self.config.enable_tick_sound
-        if enabled and self.state == self.ACTIVE_STATE:
+        state = tick.next_state if tick else self.state
+        if enabled and state == self.ACTIVE_STATE:
             self.play_sound(self.config.tick_sound_file)
 
     def get_break_elapsed(self, seconds_left):
@@ -244,37 +538,34 @@ class Pymodoro(object):
     def get_break_seconds_left(self, seconds):
         return self.config.break_duration_in_seconds + seconds
 
-    def get_colored_char(self, duration_in_seconds, seconds):
+    def get_colored_char(self, duration_in_seconds, seconds, profile=None):
+        profile = profile or self.config
         timefraction = seconds / duration_in_seconds
 
         Color = color_gradient.colorRainbow(timefraction)
 
         char = "W" if duration_in_seconds > 700 else "B"
-        return self.show_colored(Color, char)
+        return self.show_colored(Color, char, profile.markup)
 
     @staticmethod
-    def show_colored(Color, content):
-        try:
-            color = '%s%s%s' % Color
-        except TypeError:
-            color = Color
-
-        return f"<fc=#{color}>{content}</fc>"
+    def show_colored(Color, content, markup='xmobar'):
+        return outputs.colorize(markup, Color, content)
 
-    def get_progress_bar(self, duration_in_seconds, seconds):
+    def get_progress_bar(self, duration_in_seconds, seconds, profile=None):
         """Return progess bar using full and empty characters."""
+        profile = profile or self.config
         output = ""
-        total_marks = self.config.progress_bar_size
-        left_to_right = self.config.left_to_right
+        total_marks = profile.progress_bar_size
+        left_to_right = profile.left_to_right
 
-        full_mark_character = self.config.session_full_mark_character
-        empty_mark_character = self.config.empty_mark_character
+        full_mark_character = profile.session_full_mark_character
+        empty_mark_character = profile.empty_mark_character
         upper_quarter_marker_character = '#'
         middle_mark_character = 'X'
         quarter_mark_character = 'x'
 
         if self.state == self.BREAK_STATE:
-            full_mark_character = self.config.break_full_mark_character
+            full_mark_character = profile.break_full_mark_character
 
         if total_marks:
             seconds_per_mark = (duration_in_seconds / total_marks)
@@ -332,21 +623,29 @@ class Pymodoro(object):
     def play_sound(self, sound_file):
         """Play specified sound file with aplay by default."""
         if self.config.enable_sound:
-            with open(os.devnull, 'wb') as devnull:
-                subprocess.check_call(
-                    self.config.sound_command % sound_file,
-                    stdout=devnull,
-                    stderr=subprocess.STDOUT,
-                    shell=True
-                )
+            subprocess.check_call(
+                self.config.sound_command % sound_file,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.STDOUT,
+                shell=True
+            )
 
     def notify(self, strings):
         """ Send a desktop notification. """
+        self.spawn(['notify-send'] + strings)
+
+    def spawn(self, command):
+        """Start a helper process without waiting for it."""
         try:
-            Popen(['notify-send'] + strings)
+            self.children.append(Popen(command, stdin=subprocess.DEVNULL))
         except OSError:
             pass
 
+    def reap_children(self):
+        """Collect the helper processes that exited."""
+        if self.children:
+            self.children = [child for child in self.children if child.poll() is None]
+
 
 def main():
     pymodoro = Pymodoro()
@@ -8,7 +8,6 @@
 
 import os
 import sys
-import time
 import math
 
 # Append current path to the python path
@@ -39,11 +38,12 @@ class Py3status:
         sys.argv = [sys.argv[0]]
 
         pymodoro = Pymodoro()
-        pymodoro.update_state()
+        tick = pymodoro.make_tick()
+        pymodoro.update_state(tick)
 
         # Get pymodoro output and remove newline
-        text = pymodoro.make_output().rstrip()
-        pymodoro.tick_sound()
+        text = pymodoro.make_output(tick).rstrip()
+        pymodoro.tick_sound(tick)
 
         # Restore argv
         sys.argv = save_argv
@@ -61,7 +61,7 @@ class Py3status:
                 nb_minutes = int(math.floor(pymodoro.config.session_duration_in_seconds / 60))
                 colors = list(end_c.range_to(start_c,nb_minutes))
 
-                seconds_left = pymodoro.get_seconds_left()
+                seconds_left = tick.seconds_left
 
                 if seconds_left is not None:
                     nb_minutes_left = int(math.floor(seconds_left / 60))
@@ -81,7 +81,7 @@ class Py3status:
             'full_text': text,
             'color': self.color,
             # Don't cache anything
-            'cached_until': time.time()
+            'cached_until': tick.now
         }
 
         return response
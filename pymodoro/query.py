@@ -0,0 +1,95 @@
+"""
+Queries over the session history.
+
+A query filters log entries by identifier pattern, date range,
+weekday and time of day, then counts the sessions kept by the
+INTERVAL_MIN dedup per day, week, month or identifier. All filters
+are applied while scanning the log, see `export.iter_entries`.
+
+"""
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+import collections
+import datetime
+import fnmatch
+
+from . import analytics, export
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class Query(NamedTuple):
+    identifier: str = "*"
+    since: Optional[datetime.datetime] = None
+    until: Optional[datetime.datetime] = None
+    weekdays: Optional[Set[int]] = None
+    time_window: Optional[Tuple[datetime.time, datetime.time]] = None
+    group_by: str = "day"
+    interval_min: int = analytics.INTERVAL_MIN
+    hour_limit: int = analytics.HOUR_LIMIT
+
+
+def parse_weekdays(value: str) -> Set[int]:
+    """'mon,wed' or 'mon-fri' to weekday numbers."""
+    def index(name):
+        if name[:3] not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday '{name}'.")
+        return WEEKDAYS.index(name[:3])
+
+    weekdays = set()
+    for part in value.lower().split(","):
+        first, _, last = part.strip().partition("-")
+        start = index(first)
+        end = index(last) if last else start
+        weekdays.update(day % 7 for day in range(start, start + (end - start) % 7 + 1))
+    return weekdays
+
+
+def parse_time_window(value: str) -> Tuple[datetime.time, datetime.time]:
+    """'09:00-12:30' to a (start, end) pair; may wrap midnight."""
+    start, sep, end = value.partition("-")
+    if not sep:
+        raise ValueError(f"'{value}' is not a START-END time window.")
+    return datetime.time.fromisoformat(start), datetime.time.fromisoformat(end)
+
+
+def group_key(entry: export.Entry, group_by: str) -> str:
+    if group_by == "identifier":
+        return entry.identifier
+    if group_by == "week":
+        year, week, _ = entry.day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if group_by == "month":
+        return entry.day.strftime("%Y-%m")
+    return entry.day.isoformat()
+
+
+def run(log_path: str, query: Query) -> Dict[str, int]:
+    """Return the session count of each group, in group order."""
+    has_wildcards = any(c in query.identifier for c in "*?[")
+    entries = export.iter_entries(
+        log_path,
+        identifiers=None if has_wildcards else [query.identifier],
+        since=query.since,
+        until=query.until,
+        identifier_match=(
+            lambda identifier: fnmatch.fnmatchcase(identifier, query.identifier)
+        ) if has_wildcards else None,
+        time_window=query.time_window,
+        weekdays=query.weekdays,
+        interval_min=query.interval_min,
+        hour_limit=query.hour_limit
+    )
+
+    counts: Dict[str, int] = collections.Counter()
+    for entry in entries:
+        if not entry.duplicate:
+            counts[group_key(entry, query.group_by)] += 1
+    return dict(sorted(counts.items()))
+
+
+def show(counts: Dict[str, int], group_by: str):
+    print(f"{group_by},sessions")
+    for group, n in counts.items():
+        print(f"{group},{n}")
+    print(f"Total: {sum(counts.values())}")
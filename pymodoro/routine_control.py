@@ -1,25 +1,146 @@
+from typing import NamedTuple, Tuple
+
 import datetime
+import time
+
+import numpy as np
+
+from . import clock as _clock
 
 DPD = 4
 DAY_START_HOUR = 8
 BASE_HOUR = 6
 
+# Sessions expected each day, Monday first. The expected count grows
+# linearly from DAY_START_HOUR and reaches it ROUTINE_HOURS later.
+ROUTINE_SESSIONS = (DPD * 2,) * 5 + (0, 0)
+ROUTINE_HOURS = 16
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+DAY_SECONDS = 24 * 3600
+
+
+class Routine(NamedTuple):
+    sessions: Tuple[int, ...] = ROUTINE_SESSIONS
+    day_start_hour: int = DAY_START_HOUR
+    hours: int = ROUTINE_HOURS
+
+    @classmethod
+    def from_config(cls, config) -> "Routine":
+        """Read the optional [Routine] section: mon..sun, day_start, hours."""
+        parser = config._parser
+        if not parser.has_section('Routine'):
+            return cls()
 
-def main(Verbose=True):
-    h = datetime.datetime.now()
-    hday = h - datetime.timedelta(hours=DAY_START_HOUR)
-    h0 = hday.replace(hour=DAY_START_HOUR, minute=0, second=0)
+        sessions = tuple(
+            parser.getint('Routine', weekday, fallback=default)
+            for weekday, default in zip(WEEKDAYS, ROUTINE_SESSIONS)
+        )
+        return cls(
+            sessions,
+            parser.getint('Routine', 'day_start', fallback=DAY_START_HOUR),
+            parser.getint('Routine', 'hours', fallback=ROUTINE_HOURS)
+        )
 
-    day = datetime.timedelta(days=1)
+
+class Adherence(NamedTuple):
+    # Curve samples, as naive epoch seconds.
+    times: np.ndarray
+    expected: np.ndarray
+    done: np.ndarray
+    # Per routine day, as days since epoch.
+    days: np.ndarray
+    targets: np.ndarray
+    counts: np.ndarray
+
+
+def expected_sessions(h: datetime.datetime, routine: Routine = Routine()) -> float:
+    """Sessions the routine expects done by `h`."""
+    hday = h - datetime.timedelta(hours=routine.day_start_hour)
+    h0 = hday.replace(hour=routine.day_start_hour, minute=0, second=0)
 
     delta = h - h0
     elapsed = max(0, delta.total_seconds() / 3600)
 
-    elapsed_segments = elapsed / 16
-    P = elapsed_segments * DPD * 2
+    return elapsed / routine.hours * routine.sessions[h.weekday()]
+
+
+def expected_curve(epochs: np.ndarray, routine: Routine = Routine()) -> np.ndarray:
+    """`expected_sessions` of naive epoch seconds, vectorized."""
+    elapsed = (epochs - routine.day_start_hour * 3600) % DAY_SECONDS / 3600
+    # 1970-01-01 was a Thursday.
+    weekdays = (epochs // DAY_SECONDS + 3) % 7
+    return elapsed / routine.hours * np.asarray(routine.sessions)[weekdays]
+
+
+def routine_days(epochs: np.ndarray, routine: Routine = Routine()) -> np.ndarray:
+    return (epochs - routine.day_start_hour * 3600) // DAY_SECONDS
 
-    if h.weekday() > 4:
-        P = 0
+
+def adherence(entries: np.ndarray, start: int, end: int, step: int = 600,
+              routine: Routine = Routine()) -> Adherence:
+    """
+    Evaluate the routine against sorted, deduplicated session epochs
+    every `step` seconds of [start, end), and per routine day.
+    """
+    times = np.arange(start, end, step, dtype=np.int64)
+    day_starts = routine_days(times, routine) * DAY_SECONDS + routine.day_start_hour * 3600
+    done = (
+        np.searchsorted(entries, times, side="right")
+        - np.searchsorted(entries, day_starts, side="left")
+    )
+
+    first, last = routine_days(np.array([start, end - 1]), routine)
+    days = np.arange(first, last + 1)
+    entry_days = routine_days(entries, routine) - first
+    entry_days = entry_days[(entry_days >= 0) & (entry_days < len(days))]
+    counts = np.bincount(entry_days, minlength=len(days))
+    # Day numbers count from a Thursday.
+    targets = np.asarray(routine.sessions)[(days + 3) % 7]
+
+    return Adherence(times, expected_curve(times, routine), done, days, targets, counts)
+
+
+def show_adherence(report: Adherence):
+    for day, target, count in zip(report.days.tolist(), report.targets.tolist(), report.counts.tolist()):
+        date = datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+        print(f"{date.isoformat()} {date.strftime('%a')} {count:3d}/{target:<3d} {count - target:+d}")
+
+    balance = report.counts - report.targets
+    print()
+    print(f"Days on target: {int((balance >= 0).sum())}/{len(balance)}")
+    print(f"Deficit: {int(-balance[balance < 0].sum())}, surplus: {int(balance[balance > 0].sum())}")
+    if len(report.times):
+        ahead = float((report.done >= report.expected).mean())
+        print(f"Time on or ahead of the curve: {ahead * 100:.1f}%")
+
+
+def benchmark(days: int = 365, step: int = 600):
+    rng = np.random.default_rng(0)
+    end = int(time.time()) // DAY_SECONDS * DAY_SECONDS
+    start = end - days * DAY_SECONDS
+    entries = np.sort(rng.integers(start, end, days * 6))
+
+    t = time.perf_counter()
+    report = adherence(entries, start, end, step)
+    print(f"{days} days every {step}s: {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    t = time.perf_counter()
+    samples = report.times[::37]
+    expected = [
+        expected_sessions(datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=int(s)))
+        for s in samples
+    ]
+    print(f"expected_sessions loop over {len(samples)} samples: {(time.perf_counter() - t) * 1000:.1f} ms")
+    assert np.allclose(expected, report.expected[::37])
+
+
+def main(Verbose=True, now=None, clock=_clock.SYSTEM_CLOCK):
+    P = expected_sessions(now or clock.now())
     if Verbose:
         print(f"Expected sessions by now: {P}")
     return P
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,104 @@
+"""
+Drift-free tick scheduling.
+
+Ticks are scheduled on absolute deadlines of the monotonic clock, so
+the time spent working in a tick does not delay the next one. Ticks
+are phased just after wall clock second boundaries, which keeps the
+whole-second timers from skipping or repeating a second. A wall clock
+jump relative to the monotonic clock (suspend/resume, clock changes)
+re-aligns the phase. Lateness of each tick is collected as jitter
+statistics.
+
+"""
+import math
+
+from . import clock as _clock
+
+# Tick this long after the wall clock interval boundary.
+PHASE_OFFSET = 0.02
+# Wall clock moving this much more (or less) than the monotonic clock
+# between ticks counts as a jump.
+JUMP_THRESHOLD = 1.0
+
+
+class JitterStats():
+    """Running lateness statistics (Welford) in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = 0.0
+        self.skipped = 0
+        self.jumps = 0
+
+    def add(self, lateness: float):
+        self.count += 1
+        delta = lateness - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (lateness - self.mean)
+        self.max = max(self.max, lateness)
+
+    @property
+    def stddev(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def report(self) -> str:
+        return (
+            f"ticks: {self.count}, "
+            f"jitter mean: {self.mean * 1000:.2f} ms, "
+            f"stddev: {self.stddev * 1000:.2f} ms, "
+            f"max: {self.max * 1000:.2f} ms, "
+            f"skipped: {self.skipped}, "
+            f"clock jumps: {self.jumps}"
+        )
+
+
+class TickScheduler():
+    def __init__(self, interval: float, clock: _clock.Clock = _clock.SYSTEM_CLOCK):
+        self.interval = interval
+        self.clock = clock
+        self.stats = JitterStats()
+        self.align()
+
+    def align(self):
+        """Phase the next tick right after a wall clock boundary."""
+        wall = self.clock.time()
+        self.last_wall = wall
+        self.last_monotonic = self.clock.monotonic()
+        to_boundary = self.interval - (wall % self.interval)
+        self.next_tick = self.last_monotonic + to_boundary + PHASE_OFFSET
+
+    def wait(self) -> bool:
+        """
+        Sleep until the next tick deadline. Returns False when the wall
+        clock jumped, e.g. after a suspend/resume.
+        """
+        delay = self.next_tick - self.clock.monotonic()
+        if delay > 0:
+            self.clock.sleep(delay)
+
+        woke = self.clock.monotonic()
+        wall = self.clock.time()
+
+        jump = (wall - self.last_wall) - (woke - self.last_monotonic)
+        if abs(jump) > JUMP_THRESHOLD:
+            self.stats.jumps += 1
+            self.align()
+            return False
+
+        lateness = woke - self.next_tick
+        self.stats.add(lateness)
+
+        # Don't try to catch up on ticks missed by a late wake up.
+        missed = int(lateness // self.interval)
+        if missed > 0:
+            self.stats.skipped += missed
+            self.next_tick += missed * self.interval
+
+        self.next_tick += self.interval
+        self.last_wall = wall
+        self.last_monotonic = woke
+        return True
@@ -0,0 +1,35 @@
+"""
+Entry point of `pymodoro_session`.
+
+When a resident selector (`pymodoro_session --resident`) is running,
+ask it to show its window over its socket and exit right away;
+otherwise start the selector. Only the standard library is imported
+until the selector itself is needed.
+
+"""
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.path.expanduser("~/.cache/pymodoro/selector.sock")
+
+
+def show_resident() -> bool:
+    """Return whether a resident selector took the request."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(SOCKET_PATH)
+        client.sendall(b"show\n")
+    except OSError:
+        return False
+    finally:
+        client.close()
+    return True
+
+
+def main():
+    if "--resident" not in sys.argv[1:] and show_resident():
+        return
+
+    from . import session_selector
+    session_selector.main()
@@ -1,22 +1,43 @@
 from typing import Any, List, Optional
 import argparse
-import re
+import array
 import os
 import datetime
 import sys
 import random
+import re
 import string
 
 import numpy as np
 import matplotlib.pyplot as plt
-from . import configuration
+from . import configuration, journal, analytics
+from . import clock as _clock
 
 DATE_FORMAT: str = "%H:%M:%S"
 DATE_FORMAT_LOG: str = "%d/%m/%y - %H:%M:%S"
+# A session line of the log, capturing its DATE_FORMAT_LOG date and identifier.
+ENTRY_PATTERN = re.compile(r"\[([\d -:]+)\] (.+) session\.")
+ENTRY_PATTERN_BYTES = re.compile(ENTRY_PATTERN.pattern.encode())
 DATE_FORMAT_SHOW: str = "%d/%m/%y - %A - %H:%M:%S"
 
 
+def argument_type(parse):
+    """Wrap a parser for `type=`: invalid values become usage errors."""
+    def convert(value):
+        try:
+            return parse(value)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return convert
+
+
 def parse_arguments():
+    from .bulk_import import parse_end_timestamp, parse_timestamp
+    from .query import parse_time_window, parse_weekdays
+
+    since_type = argument_type(parse_timestamp)
+    until_type = argument_type(parse_end_timestamp)
+
     parser = argparse.ArgumentParser()
 
     actions = parser.add_subparsers(title="check", dest="action")
@@ -27,9 +48,90 @@ def parse_arguments():
     check = actions.add_parser("check")
 
     _pause = actions.add_parser("pause")
-    _plot = actions.add_parser("plot")
-    _autofill = actions.add_parser("autofill")
+    plot = actions.add_parser("plot")
+    plot.add_argument(dest="identifier", nargs="?", default="research")
+    plot.add_argument("-d", "--past-days", type=int, default=7, help="Days back to plot.")
+    autofill = actions.add_parser("autofill")
     _delete = actions.add_parser("delete")
+    bulk = actions.add_parser("import", help="Import sessions from CSV or ICS.")
+
+    export = actions.add_parser("export", help="Export the session log.")
+    export.add_argument("-f", "--format", choices=["csv", "jsonl", "npy", "npz"], default="csv")
+    export.add_argument("-o", "--output", help="Output file (default: stdout).", default=None)
+    export.add_argument(
+        "-i",
+        "--identifier",
+        action="append",
+        dest="identifiers",
+        help="Only export this identifier, can be repeated."
+    )
+    export.add_argument("--since", type=since_type, help="Start date (ISO 8601).", default=None)
+    export.add_argument("--until", type=until_type, help="End date (ISO 8601), inclusive.", default=None)
+
+    aggregate = actions.add_parser("aggregate", help="Aggregate many users' logs.")
+    aggregate.add_argument(dest="pattern", help="Directory or glob of log files.")
+    aggregate.add_argument(
+        "-i",
+        "--identifier",
+        action="append",
+        dest="identifiers",
+        help="Only count this identifier, can be repeated."
+    )
+    aggregate.add_argument("-j", "--jobs", type=int, default=None, help="Worker processes.")
+    aggregate.add_argument("--chunk-size", type=int, default=16, help="Chunk size in MiB.")
+
+    query = actions.add_parser("query", help="Count sessions with filters.")
+    query.add_argument(
+        dest="identifier",
+        nargs="?",
+        default="*",
+        help="Identifier or glob pattern (default: all)."
+    )
+    query.add_argument("--since", type=since_type, help="Start date (ISO 8601).", default=None)
+    query.add_argument("--until", type=until_type, help="End date (ISO 8601), inclusive.", default=None)
+    query.add_argument(
+        "-w",
+        "--weekdays",
+        type=argument_type(parse_weekdays),
+        help="e.g. mon-fri or sat,sun.",
+        default=None
+    )
+    query.add_argument(
+        "-t",
+        "--between",
+        type=argument_type(parse_time_window),
+        help="Time of day window, e.g. 09:00-12:00.",
+        default=None
+    )
+    query.add_argument(
+        "-g",
+        "--group-by",
+        choices=["day", "week", "month", "identifier"],
+        default="day"
+    )
+    query.add_argument("--interval-min", type=int, default=None, help="Dedup interval in minutes.")
+    query.add_argument("--hour-limit", type=int, default=None, help="Hour at which days start.")
+
+    _stats = actions.add_parser("stats", help="Streaks, averages and totals.")
+    adherence = actions.add_parser("adherence", help="Sessions against the routine, per day.")
+    adherence.add_argument(dest="identifier", nargs="?", default="research")
+    adherence.add_argument("-d", "--past-days", type=int, default=90, help="Days back to report.")
+    adherence.add_argument("-s", "--step", type=int, default=10, help="Curve step in minutes.")
+
+    _migrate = actions.add_parser("migrate", help="Index the log in the SQLite history store.")
+
+    autofill.add_argument(dest="identifier")
+    autofill.add_argument(dest="start_time", help="Start time as HHMM.")
+    autofill.add_argument(dest="number", type=int)
+
+    bulk.add_argument(dest="path", help="CSV or ICS file, '-' for stdin.")
+    bulk.add_argument("-f", "--format", choices=["csv", "ics"], default=None)
+    bulk.add_argument(
+        "-i",
+        "--identifier",
+        help="Identifier for all entries, overriding the input.",
+        default=None
+    )
 
     check.add_argument(
         "-d",
@@ -43,66 +145,113 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def epoch(date: datetime.datetime) -> int:
+    """Integer epoch seconds of a naive local datetime."""
+    return int(date.timestamp())
+
+
 class Session():
-    Events: List[datetime.datetime] = []
-    WORK: int = 25
-    REST: int = 5
-    ID: str = ""
-    CREATION_DATE: datetime.datetime = datetime.datetime.now()
-    LAST_CHECK: Optional[datetime.datetime] = None
-    REMAINING_SEC: int = 0
-
-    def __init__(self, filepath):
-        self.ID = self.generate_id()
+    """
+    A session read from its journal. Pause/resume events are kept as
+    an array of integer epoch seconds, and the time spent in finished
+    pauses is summed as events are read; `Events` converts them to
+    datetimes for older callers.
+    """
+    __slots__ = (
+        "ID",
+        "IDENTIFIER",
+        "WORK",
+        "REST",
+        "CREATION_DATE",
+        "LAST_CHECK",
+        "REMAINING_SEC",
+        "filepath",
+        "clock",
+        "journal",
+        "events",
+        "paused_seconds"
+    )
+
+    def __init__(self, filepath, clock: _clock.Clock = _clock.SYSTEM_CLOCK):
+        self.ID: str = self.generate_id()
+        self.IDENTIFIER: Optional[str] = None
+        self.WORK: int = 25
+        self.REST: int = 5
+        self.CREATION_DATE: datetime.datetime = clock.now()
+        self.LAST_CHECK: Optional[datetime.datetime] = None
+        self.REMAINING_SEC: int = 0
         self.filepath = filepath
+        self.clock = clock
+        self.journal = journal.JournalReader(filepath)
+        self.clear_events()
         self.read_session_file()
 
     def write_session_file(self):
-        with open(self.filepath, 'w') as f:
-            f.write(self.ID + "\n")
-            f.write(self.CREATION_DATE.strftime(DATE_FORMAT_LOG) + "\n")
-            f.write(f"{self.WORK} {self.REST}\n")
-            for e in self.Events:
-                f.write(datetime.datetime.strftime(e, DATE_FORMAT_LOG) + "\n")
+        header = [
+            self.ID,
+            self.CREATION_DATE.strftime(DATE_FORMAT_LOG),
+            " ".join([str(self.WORK), str(self.REST)] + ([self.IDENTIFIER] if self.IDENTIFIER else []))
+        ]
+        events = [
+            datetime.datetime.strftime(e, DATE_FORMAT_LOG)
+            for e in self.Events
+        ]
+        journal.write(self.filepath, header + events)
+
+    def add_event(self, date: datetime.datetime) -> bool:
+        """Append a pause/resume event to the session journal."""
+        return journal.append(self.filepath, date.strftime(DATE_FORMAT_LOG))
+
+    def clear_events(self):
+        self.events = array.array('q')
+        self.paused_seconds = 0
+
+    def push_event(self, timestamp: int):
+        """Add an event, given as epoch seconds, to the in-memory session."""
+        self.events.append(timestamp)
+        if not len(self.events) % 2:
+            self.paused_seconds += timestamp - self.events[-2]
 
     @property
-    def is_paused(self) -> bool:
-        print(self.Events)
-        if len(self.Events) % 2:
-            print(True)
-            return True
-        return False
+    def Events(self) -> List[datetime.datetime]:
+        return [datetime.datetime.fromtimestamp(e) for e in self.events]
 
-    def read_session_file(self):
-        """Get pomodoro and break durations from session as a list."""
-        self.LAST_CHECK = datetime.datetime.now()
-        if not os.path.exists(self.filepath):
-            return
+    @Events.setter
+    def Events(self, dates: List[datetime.datetime]):
+        self.clear_events()
+        for date in dates:
+            self.push_event(epoch(date))
 
-        with open(self.filepath) as f:
-            content = f.readline()
-            self.ID = content
+    @property
+    def is_paused(self) -> bool:
+        return len(self.events) % 2 == 1
 
-            content = f.readline()
+    def read_session_file(self):
+        """Read the session journal records written since the last read."""
+        self.LAST_CHECK = self.clock.now()
+
+        reset, records = self.journal.read()
+        if reset and not records:
+            # The session was deleted.
+            self.clear_events()
+        elif reset:
+            self.ID = records[0]
             self.CREATION_DATE = datetime.datetime.strptime(
-                content.strip("\n"),
+                records[1],
                 DATE_FORMAT_LOG
             )
+            # Older session files have no identifier after the durations.
+            work, rest, *identifier = records[2].split(" ", 2)
+            self.WORK, self.REST = int(work), int(rest)
+            self.IDENTIFIER = identifier[0] if identifier else None
+
+            self.clear_events()
+            records = records[journal.HEADER_SIZE:]
+
+        for event in records:
+            e = datetime.datetime.strptime(event, DATE_FORMAT_LOG)
+            self.push_event(epoch(e))
 
-            content = f.readline()
-            self.WORK, self.REST = list(map(int, content.split(" ")))
-
-            self.Events = []
-            for event in f.readlines():
-                try:
-                    e = datetime.datetime.strptime(
-                        event.strip("\n"),
-                        DATE_FORMAT_LOG
-                    )
-                    self.Events.append(e)
-                except ValueError:
-                    print(event)
-                    raise
     @staticmethod
     def generate_id() -> str:
         chars = string.ascii_uppercase + string.digits
@@ -116,123 +265,149 @@ class Session():
 
         return None
 
-    def get_seconds_left(self) -> Optional[int]:
-        """Return seconds remaining in the current session."""
-        seconds_left = None
-
-        session_duration = self.WORK * 60
+    def get_seconds_left(self, now: Optional[float] = None) -> Optional[int]:
+        """
+        Return seconds remaining in the current session at `now`
+        (epoch seconds, default: the clock), negative once it is over.
+        Computed on integer epoch seconds.
+        """
+        now = int(self.clock.time() if now is None else now)
 
-        session_creation_time = self.CREATION_DATE
-
-        now = datetime.datetime.now()
+        # Only the records appended since the last check are parsed.
+        self.read_session_file()
 
         if os.path.isfile(self.filepath):
-            delta_creation = (now - session_creation_time).seconds
+            session_duration = self.WORK * 60
+            seconds_left = session_duration - (now - epoch(self.CREATION_DATE))
 
-            if self.LAST_CHECK is not None:
-                delta_check_sec = (session_creation_time - self.LAST_CHECK).seconds
+            frozen = 0
+            if self.is_paused:
+                frozen = now - self.events[-1]
 
-                if delta_check_sec > 5:
-                    # the session file has been updated
-                    # re-read the contents
-                    self.read_session_file()
+            return seconds_left + self.paused_seconds + frozen
 
-            seconds_left = session_duration - delta_creation
+        return None
 
-            paused_seconds = 0
-            for i, event in enumerate(self.Events):
-                if i % 2:
-                    d = (event - self.Events[i-1]).seconds
-                    print(">" + str(d))
-                    paused_seconds += d
 
-            frozen = 0
-            if self.is_paused:
-                frozen = (now - self.Events[-1]).seconds
+def benchmark_memory(n_sessions: int = 20, n_events: int = 5000):
+    """Per-session memory of sessions with `n_events` pause events."""
+    import tempfile
+    import tracemalloc
 
-            return seconds_left + paused_seconds + frozen
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session")
+        session = Session(path)
+        session.CREATION_DATE = datetime.datetime.now().replace(microsecond=0)
+        start = epoch(session.CREATION_DATE)
+        session.Events = [
+            datetime.datetime.fromtimestamp(start + 60 * i)
+            for i in range(n_events)
+        ]
+        session.write_session_file()
 
-        return None
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        sessions = [Session(path) for _ in range(n_sessions)]
+        compact = (tracemalloc.get_traced_memory()[0] - before) / n_sessions
 
+        before = tracemalloc.get_traced_memory()[0]
+        expanded = [session.Events for session in sessions]
+        datetimes = (tracemalloc.get_traced_memory()[0] - before) / n_sessions
+        tracemalloc.stop()
 
-def log(log_path: str, message, date=datetime.datetime.now()):
-    with open(log_path, 'a') as f:
+    assert all(len(events) == n_events for events in expanded)
+    print(f"{n_sessions} sessions with {n_events} events each.")
+    print(f"Per session: {compact / 1024:.1f} KiB, "
+          f"events array: {sessions[0].events.itemsize * n_events / 1024:.1f} KiB.")
+    print(f"The same events as datetimes: {datetimes / 1024:.1f} KiB per session.")
 
-        now_str = date.strftime(DATE_FORMAT_LOG)
-        f.write(f"[{now_str}] {message}\n")
 
 
-def check_entries(config, past_days=7, identifier: str = "research", Verbose: int = 1) -> List[List[datetime.datetime]]:
-    now = datetime.datetime.now()
-    Dates = []
-    with open(config.log_path, 'r', encoding='utf-8') as f:
-        for line in f.readlines():
-            res = re.findall(rf"\[([\d -:]+)\] {identifier} session.", line)
-            if res:
-                date = datetime.datetime.strptime(res[0], DATE_FORMAT_LOG)
-                Dates.append(date)
-
-    preliminary = [
-        abs((now - date).total_seconds())
-        for date in Dates
-        if abs((now - date).total_seconds()) < past_days * 24 * 3600
-    ]
-
-    Results = []
-    for day in range(past_days, -1, -1):
-        moment = now - datetime.timedelta(hours=24*day)
-        res = check_entries_day(Dates, moment, Verbose)
-        Results.append(res)
+def format_log_line(date: datetime.datetime, message: str) -> str:
+    """A line of the log; every writer of the log formats it here."""
+    return f"[{date.strftime(DATE_FORMAT_LOG)}] {message}\n"
 
-    n_expected = len(preliminary)
-    n_results = sum(len(r) for r in Results)
-    if n_expected != n_results:
-        print(f"Bad calculation! Expected {n_expected} but got {n_results}.")
 
-    return Results
+def log(log_path: str, message, date: Optional[datetime.datetime] = None):
+    if date is None:
+        date = datetime.datetime.now()
+
+    with journal.locked(log_path), open(log_path, 'a') as f:
+        f.write(format_log_line(date, message))
 
 
 def same_day(dates=List[datetime.datetime]) -> bool:
     return len(list(set([(d.day, d.month, d.year) for d in dates]))) == 1
 
 
-def check_entries_day(Dates: List[datetime.datetime], moment: datetime.datetime, Verbose: int = 1) -> List[datetime.datetime]:
+def show_day_summary(moment: datetime.datetime, Count: int, Verbose: int = 1):
+    if Verbose:
+        print(f"Summary for {moment.strftime(DATE_FORMAT_SHOW)}.")
+        print(f"Pomodoro sessions completed sucessfully: {Count}")
+        print()
+
+
+def check_entries(config, past_days=7, identifier: str = "research", Verbose: int = 1) -> List[int]:
+    """
+    Deduplicated session counts of the days from `past_days` ago to
+    today, see `api.day_counts`. Returns the counts rather than the
+    entries of each day, as the history store only keeps counts.
+    """
+    from . import api
+
+    now = datetime.datetime.now()
+    counts = api.day_counts(identifier, past_days, now, config)
+    for day, count in zip(range(past_days, -1, -1), counts):
+        show_day_summary(now - datetime.timedelta(days=day), count, Verbose)
+    return counts
 
-    INTERVAL_MIN = 20
-    HOUR_LIMIT = 7
 
+def check_entries_day(Dates: List[datetime.datetime], moment: datetime.datetime, Verbose: int = 1) -> List[datetime.datetime]:
+    """
+    Reference implementation of the per-day dedup, see
+    `analytics.count_per_day` for the vectorized one.
+    """
     CurrentDates = []
     for d, date in enumerate(Dates):
         if d:
-            OLD = abs((date - Dates[d - 1]).total_seconds()) / 60 > INTERVAL_MIN
+            OLD = abs((date - Dates[d - 1]).total_seconds()) / 60 > analytics.INTERVAL_MIN
 
             if not OLD:
                 continue
 
-        shifted = date - datetime.timedelta(hours=HOUR_LIMIT)
+        shifted = date - datetime.timedelta(hours=analytics.HOUR_LIMIT)
 
         if shifted.date() == moment.date():
             CurrentDates.append(date)
 
-    Count = len(CurrentDates)
-    if Verbose:
-        print(f"Summary for {moment.strftime(DATE_FORMAT_SHOW)}.")
-        print(f"Pomodoro sessions completed sucessfully: {Count}")
-        print()
+    show_day_summary(moment, len(CurrentDates), Verbose)
 
     return CurrentDates
 
 
-def plot_days(config):
+def heatmap_days(config, past_days=7, identifier: str = "research", Verbose: int = 1) -> np.ndarray:
+    """
+    The days x 10-minute session matrix of the last `past_days` days,
+    from the incremental heatmap cache.
+    """
+    from . import heatmap, history
 
-    days = check_entries(config, Verbose=2)
+    now = datetime.datetime.now()
+    today = analytics.day_number(now)
+
+    cache = heatmap.Heatmap(heatmap.cache_path(config, identifier))
+    cache.refresh(history.open_store(config), identifier, config.log_path)
+
+    for day in range(past_days, -1, -1):
+        count = cache.counts.get(today - day, 0)
+        show_day_summary(now - datetime.timedelta(hours=24 * day), count, Verbose)
 
-    matrix = np.zeros(shape=(len(days), 24 * 6))
-    for d, day in enumerate(days):
-        for date in day:
-            start = date.hour * 6 + round(date.minute / 10)
-            end = start + 3
-            matrix[d, start:end] = 1
+    return cache.matrix(today - past_days, today)
+
+
+def plot_days(config, past_days=7, identifier: str = "research"):
+
+    matrix = heatmap_days(config, past_days, identifier, Verbose=2)
 
     plt.matshow(matrix)
     locs, labels = plt.xticks()
@@ -249,77 +424,169 @@ def plot_days(config):
 
 
 def autofill(config, start_time, identifier, n):
+    from . import history
 
     H = int(start_time[:2])
     M = int(start_time[2:])
     start_date = datetime.datetime.now().replace(
-        hour=H, minute=M, second=0)
+        hour=H, minute=M, second=0, microsecond=0)
 
+    entries = []
     for _ in range(n):
-        log(config.log_path, f"{identifier} session.", start_date)
+        entries.append((start_date, identifier))
         start_date += datetime.timedelta(minutes=30)
 
+    history.open_store(config).extend(entries)
 
-def main():
 
-    options = parse_arguments()
+def create_session(config, identifier: str,
+                   clock: _clock.Clock = _clock.SYSTEM_CLOCK) -> bool:
+    """
+    Start a new session unless one is still running; returns whether
+    a session was created.
+    """
+    if os.path.isfile(config.session_file):
+        session = Session(config.session_file, clock)
+        if session.get_seconds_left() > 0:
+            return False
+        journal.remove(config.session_file)
 
-    Identifier = "research"
-    if len(sys.argv) > 1:
-        if not sys.argv[1].startswith("-"):
-            Identifier = sys.argv.pop(1)
+    new_session = Session(config.session_file, clock)
+    new_session.CREATION_DATE = clock.now().replace(microsecond=0)
+    new_session.IDENTIFIER = identifier
+    new_session.write_session_file()
 
-    config = configuration.Config(args=False)
+    from . import history
+    history.open_store(config).append(new_session.CREATION_DATE, identifier)
+    return True
 
-    session_exists = os.path.isfile(config.session_file)
 
-    if options.action == "create":
-        if session_exists:
-            session = Session(config.session_file)
-            if session.get_seconds_left() > 0:
-                return
-            os.remove(config.session_file)
+def main():
+
+    from . import api
 
-        new_session = Session(config.session_file)
-        new_session.write_session_file()
+    options = parse_arguments()
 
-        log(config.log_path, f"{options.identifier} session.")
+    config = configuration.Config(args=False)
+
+    if options.action == "create":
+        api.create(options.identifier, config)
 
     elif options.action == "pause":
-        if not session_exists:
-            return
-        with open(config.session_file, 'a', encoding="utf-8") as f:
-            now = datetime.datetime.now()
-            f.write(now.strftime(DATE_FORMAT_LOG) + "\n")
+        api.toggle_pause(config)
 
     elif options.action == "delete":
-        os.remove(config.session_file)
-        log(config.log_path, "Session aborted.")
+        api.delete(config)
 
     elif options.action == "check":
+        now = datetime.datetime.now()
         for Identifier in options.queries:
-            total = check_entries(config, options.past_days, identifier=Identifier)
-            ts = [len(x) for x in total]
-            print(f"Total: {sum(ts)}")
+            counts = api.day_counts(Identifier, options.past_days, now, config)
+            for day, count in zip(range(options.past_days, -1, -1), counts):
+                show_day_summary(now - datetime.timedelta(hours=24 * day), count)
+            print(f"Total: {sum(counts)}")
 
     elif options.action == "plot":
-        plot_days(config)
+        plot_days(config, options.past_days, options.identifier)
 
     elif options.action == "autofill":
-        try:
-            start_time = sys.argv[1]
-            number = sys.argv[2]
-        except IndexError:
+        if len(options.start_time) != 4 or not options.start_time.isdigit():
             print("Wrong arguments for autofill (sample args: research 1700 2).")
             sys.exit(1)
 
-        try:
-            number = int(number)
-        except:
-            print("Bad 'number' argument.")
-            sys.exit(1)
-
-        autofill(config, start_time, Identifier, number)
+        autofill(config, options.start_time, options.identifier, options.number)
+
+    elif options.action == "export":
+        from . import export
+
+        entries = export.iter_entries(
+            config.log_path,
+            options.identifiers,
+            options.since,
+            options.until
+        )
+
+        if options.format in ("npy", "npz"):
+            if options.output is None:
+                print("NumPy exports need an output file (-o).")
+                sys.exit(1)
+            writer = {"npy": export.write_npy, "npz": export.write_npz}
+            writer[options.format](entries, options.output)
+        else:
+            writer = {"csv": export.write_csv, "jsonl": export.write_jsonl}
+            if options.output is None:
+                writer[options.format](entries, sys.stdout)
+            else:
+                with open(options.output, 'w', encoding="utf-8", newline="") as out:
+                    writer[options.format](entries, out)
+
+    elif options.action == "query":
+        from . import query
+
+        q = query.Query(
+            identifier=options.identifier,
+            since=options.since,
+            until=options.until,
+            weekdays=options.weekdays,
+            time_window=options.between,
+            group_by=options.group_by
+        )
+        if options.interval_min is not None:
+            q = q._replace(interval_min=options.interval_min)
+        if options.hour_limit is not None:
+            q = q._replace(hour_limit=options.hour_limit)
+
+        query.show(query.run(config.log_path, q), q.group_by)
+
+    elif options.action == "stats":
+        from . import stats
+
+        statistics = stats.Statistics(config.log_path).update()
+        stats.show(statistics.report(session_minutes=config.session_duration_in_minutes))
+
+    elif options.action == "migrate":
+        from . import history
+
+        n = history.migrate(config)
+        print(f"Indexed {n} new sessions in {config.history_db_path}.")
+        if config.history_backend != "sqlite":
+            print("Set 'history = sqlite' in the [General] section of the config to use it.")
+
+    elif options.action == "adherence":
+        from . import routine_control
+
+        routine_control.show_adherence(api.adherence(
+            options.identifier,
+            options.past_days,
+            options.step,
+            config=config
+        ))
+
+    elif options.action == "aggregate":
+        from . import aggregate
+
+        aggregate.show(aggregate.aggregate(
+            options.pattern,
+            options.identifiers,
+            options.jobs,
+            options.chunk_size * 1024 * 1024
+        ))
+
+    elif options.action == "import":
+        from . import bulk_import
+
+        from . import history
+
+        n, errors = bulk_import.import_file(
+            config.log_path,
+            options.path,
+            options.format,
+            options.identifier,
+            history.open_store(config)
+        )
+        for error in errors:
+            print(f"Skipped line {error}", file=sys.stderr)
+        print(f"Imported {n} sessions.")
 
 
 if __name__ == '__main__':
@@ -2,32 +2,54 @@
 
 import random
 import sys
-import subprocess
 import os
+import signal
+import socket
 from functools import partial
-from PySide6.QtCore import Qt, Slot
+from PySide6.QtCore import Qt, Slot, QSocketNotifier
+from PySide6.QtNetwork import QLocalServer
 from PySide6.QtWidgets import (QApplication, QLabel, QPushButton,
                                QVBoxLayout, QWidget)
 from __feature__ import snake_case, true_property
 
 import yaml
 
+from . import api
+from .selector_client import SOCKET_PATH
+
 
 def launch(identifier):
     print(identifier)
-    subprocess.call(["pymodoro_ctrl", "create", identifier])
-    sys.exit(0)
+    api.create(identifier)
 
 
 class Pane(QWidget):
-    def __init__(self, actions_filepath):
+    def __init__(self, actions_filepath, resident=False):
         QWidget.__init__(self)
 
         self.layout = QVBoxLayout(self)
 
         self.buttons = []
+        self.actions_filepath = actions_filepath
+        self.actions_mtime = None
+        self.resident = resident
+
+        self.load_actions()
+
+    def load_actions(self):
+        """(Re)build the buttons if the actions file changed."""
+        mtime = os.stat(self.actions_filepath).st_mtime_ns
+        if mtime == self.actions_mtime:
+            return
+        self.actions_mtime = mtime
+
+        while self.layout.count():
+            widget = self.layout.take_at(0).widget()
+            if widget is not None:
+                widget.delete_later()
+        self.buttons = []
 
-        with open(actions_filepath) as f:
+        with open(self.actions_filepath) as f:
             identifiers = yaml.load(f.read(), yaml.loader.Loader)
 
         for category in identifiers:
@@ -38,23 +60,80 @@ class Pane(QWidget):
             self.layout.add_widget(self.message)
             for identifier in identifiers[category]:
                 button = QPushButton(identifier)
-                button.clicked.connect(partial(launch, identifier))
+                button.clicked.connect(partial(self.select, identifier))
                 self.buttons.append(button)
                 self.layout.add_widget(button)
 
         for _ in range(5):
             self.layout.add_widget(QLabel(""))
 
+    def select(self, identifier):
+        launch(identifier)
+        if self.resident:
+            self.hide()
+        else:
+            sys.exit(0)
+
+    def summon(self):
+        self.load_actions()
+        self.show()
+        self.raise_()
+        self.activate_window()
+
     @Slot()
     def magic(self):
         self.message.text = random.choice(self.hello)
 
 
+def serve(widget: Pane):
+    """
+    Show the hidden widget on a "show" message over SOCKET_PATH or on
+    SIGUSR1.
+    """
+    os.makedirs(os.path.dirname(SOCKET_PATH), exist_ok=True)
+    QLocalServer.remove_server(SOCKET_PATH)
+    server = QLocalServer(widget)
+    if not server.listen(SOCKET_PATH):
+        raise RuntimeError(f"Cannot listen on {SOCKET_PATH}: {server.error_string()}")
+
+    def on_connection():
+        connection = server.next_pending_connection()
+        if connection.wait_for_ready_read(500):
+            if bytes(connection.read_all()).strip() == b"show":
+                widget.summon()
+        connection.disconnect_from_server()
+
+    server.newConnection.connect(on_connection)
+
+    # Signals wake the Qt loop through a socket pair.
+    receiver, sender = socket.socketpair()
+    sender.setblocking(False)
+    signal.set_wakeup_fd(sender.fileno())
+    signal.signal(signal.SIGUSR1, lambda *_: None)
+    notifier = QSocketNotifier(receiver.fileno(), QSocketNotifier.Type.Read, widget)
+
+    def on_signal():
+        if signal.SIGUSR1 in receiver.recv(64):
+            widget.summon()
+
+    notifier.activated.connect(on_signal)
+
+    # Keep everything alive with the widget.
+    widget.server = server
+    widget.signal_sockets = (receiver, sender, notifier)
+
+
 def main():
+    resident = "--resident" in sys.argv[1:]
     app = QApplication(sys.argv)
 
-    widget = Pane(os.path.join(os.getenv("HOME"), ".pomodoro_actions"))
-    widget.show()
+    widget = Pane(os.path.join(os.getenv("HOME"), ".pomodoro_actions"), resident)
+
+    if resident:
+        app.quit_on_last_window_closed = False
+        serve(widget)
+    else:
+        widget.show()
 
     sys.exit(app.exec_())
 
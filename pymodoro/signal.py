@@ -1,5 +1,13 @@
-from . import routine_control, session_control, configuration
+import datetime
 import math
+import os
+import sys
+
+from . import snapshot
+
+CACHE_PATH = os.path.join(snapshot.SNAPSHOT_DIR, "signal")
+# How far ahead to look for the next change of the output.
+HORIZON_SECONDS = 3600
 
 
 def sigmoid(x, k=1.2):
@@ -22,14 +30,9 @@ def calculate_colors(score):
     return map(score_to_color, (R, G))
 
 
-def main():
-    required = routine_control.main(Verbose=False)
-    done = session_control.check_entries(
-        configuration.Config(),
-        past_days=1,
-        Verbose=0)[-1]
+def render(n_done, required):
+    from .routine_control import DPD
 
-    n_done = len(done)
     score = n_done - required
     R, G = calculate_colors(score)
 
@@ -38,8 +41,46 @@ def main():
     ss = str(S)
     if len(ss) < 2:
         ss = "+" + ss
-    if n_done >= routine_control.DPD * 2:
+    if n_done >= DPD * 2:
         ss = "OK"
 
-    print(f"<fc=#{R}{G}22>{ss}</fc>")
-    print(score, R, G)
+    return f"<fc=#{R}{G}22>{ss}</fc>\n"
+
+
+def compute():
+    """Return the output, its validity deadline and the files it depends on."""
+    import numpy as np
+
+    from . import analytics, configuration, routine_control, stats
+
+    config = configuration.Config()
+    routine = routine_control.Routine.from_config(config)
+    now = datetime.datetime.now()
+    required = routine_control.expected_sessions(now, routine)
+
+    # Only the log lines appended since the last poll are parsed.
+    statistics = stats.Statistics(config.log_path).update()
+    n_done = statistics.day_count(analytics.day_number(now), "research")
+    output = render(n_done, required)
+
+    # The expected count grows with time: find when the output changes.
+    # Today's count can only change with the log or at midnight.
+    midnight = datetime.datetime.combine(now.date(), datetime.time()) + datetime.timedelta(days=1)
+    horizon = min(HORIZON_SECONDS, int((midnight - now).total_seconds()))
+    valid_for = horizon
+    moments = analytics.to_epoch([now])[0] + np.arange(1, horizon)
+    for seconds, expected in enumerate(routine_control.expected_curve(moments, routine).tolist(), 1):
+        if render(n_done, expected) != output:
+            valid_for = seconds - 1
+            break
+
+    return output, now.timestamp() + valid_for, [config.log_path, config._file]
+
+
+def main():
+    output = snapshot.read_cache(CACHE_PATH)
+    if output is None:
+        output, valid_until, paths = compute()
+        snapshot.write_cache(CACHE_PATH, output, valid_until, snapshot.fingerprints(paths))
+
+    sys.stdout.write(output)
@@ -0,0 +1,300 @@
+"""
+Accelerated simulation of the status loop.
+
+A scripted timeline of session commands is replayed against the real
+Pymodoro loop (`Pymodoro.tick`) running on a VirtualClock. The user's
+config only provides the rendering settings: every file the loop or the
+commands touch (session, history, hooks, plugins, outputs) is in a
+scratch directory, removed by `close`. Every state transition, output
+line and side effect (notifications, sounds, hooks) is recorded with
+its simulated time instead of being performed.
+
+Timelines have one command per line, at seconds from the start:
+
+    0 create research
+    600 pause
+    900 resume
+    4000 create code
+    4300 delete
+
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import argparse
+import collections
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from . import api, configuration, monitor, outputs
+from .clock import VirtualClock
+from .pymodoro import Pymodoro
+
+DEFAULT_TIMELINE = """
+0 create research
+600 pause
+900 resume
+2400 create research
+3000 delete
+3600 create code
+"""
+
+ACTIONS = ["create", "pause", "resume", "delete"]
+# Traced memory the soak test tolerates growing by after the warm up.
+SOAK_MEMORY_LIMIT = 256 * 1024
+# Ticks between the config reloads of the soak test.
+SOAK_RELOAD_INTERVAL = 1000
+
+
+class Record(NamedTuple):
+    time: float
+    kind: str
+    detail: str
+
+
+def parse_timeline(text: str) -> List[Tuple[float, str, str]]:
+    timeline = []
+    for n, line in enumerate(text.splitlines(), 1):
+        line = line.split("#")[0].strip()
+        if not line:
+            continue
+        at, action, *argument = line.split(maxsplit=2)
+        if action not in ACTIONS:
+            raise ValueError(f"Line {n}: unknown action '{action}'.")
+        timeline.append((float(at), action, argument[0] if argument else ""))
+    return sorted(timeline, key=lambda command: command[0])
+
+
+class SimulatedPymodoro(Pymodoro):
+    """
+    Records side effects instead of performing them. With `spawn`,
+    notifications still start a harmless process, to exercise the
+    child process handling.
+    """
+
+    def __init__(self, config, clock, simulation, spawn=False):
+        self.simulation = simulation
+        self.spawn_notifications = spawn
+        Pymodoro.__init__(self, config, clock)
+
+    def update_state(self, tick):
+        Pymodoro.update_state(self, tick)
+        simulation = self.simulation
+        if self.state != simulation.last_state:
+            simulation.record("state", f"{simulation.last_state} -> {self.state}")
+            simulation.last_state = self.state
+
+    def write_output(self, output):
+        simulation = self.simulation
+        if output != simulation.last_output:
+            simulation.record("output", output.rstrip("\n"))
+            simulation.last_output = output
+
+    def notify(self, strings):
+        self.simulation.record("notify", " / ".join(strings))
+        if self.spawn_notifications:
+            self.spawn(["true"])
+
+    def play_sound(self, sound_file):
+        self.simulation.record("sound", os.path.basename(sound_file))
+
+    def run_hook(self, hook_file):
+        self.simulation.record("hook", os.path.basename(hook_file))
+
+
+class Simulation():
+    def __init__(self, timeline: List[Tuple[float, str, str]],
+                 start: Optional[datetime.datetime] = None,
+                 directory: Optional[str] = None,
+                 keep_records: bool = True,
+                 spawn: bool = False,
+                 extra_outputs: bool = False):
+        self.timeline = timeline
+        self.pending = collections.deque(timeline)
+        self.scratch = None
+        if directory is None:
+            self.scratch = tempfile.TemporaryDirectory(prefix="pymodoro-simulation-")
+            directory = self.scratch.name
+        self.directory = directory
+        self.clock = VirtualClock(start or datetime.datetime(2024, 1, 1, 9))
+        self.start = self.clock.time()
+        self.records: List[Record] = []
+        self.keep_records = keep_records
+        self.counts: Dict[str, int] = collections.Counter()
+        self.last_state = None
+        self.last_output = None
+        self.extra_outputs = extra_outputs
+
+        self.config = self.make_config()
+        self.pymodoro = SimulatedPymodoro(self.config, self.clock, self, spawn)
+        self.pymodoro.snapshot_path = os.path.join(self.directory, "snapshot")
+
+    def make_config(self) -> configuration.Config:
+        """The user's config, with every file it names in the scratch directory."""
+        config = configuration.Config(args=False)
+        config.session_file = os.path.join(self.directory, "session")
+        config.log_path = os.path.join(self.directory, "log")
+        config.history_backend = "text"
+        config.history_db_path = os.path.join(self.directory, "history.sqlite3")
+        config.publish_snapshot = False
+        config.output_profiles = []
+        config.hook_mode = "process"
+        config.plugins_dir = os.path.join(self.directory, "plugins")
+        config.start_pomodoro_hook_file = os.path.join(self.directory, "start-pomodoro.py")
+        config.complete_pomodoro_hook_file = os.path.join(self.directory, "complete-pomodoro.py")
+        for hook_file in (config.start_pomodoro_hook_file, config.complete_pomodoro_hook_file):
+            open(hook_file, 'a').close()
+
+        if self.extra_outputs:
+            # A file output, and a FIFO nobody reads.
+            config.publish_snapshot = True
+            config.output_profiles = [
+                outputs.OutputProfile("file", config, os.path.join(self.directory, "output")),
+                outputs.OutputProfile("fifo", config, os.path.join(self.directory, "fifo"), fifo=True)
+            ]
+        return config
+
+    def reload(self):
+        """Hand a reparsed config to the loop, as the config watcher does."""
+        config = self.make_config()
+        with self.pymodoro.config_lock:
+            self.pymodoro.pending_config = config
+
+    def close(self):
+        """Remove the scratch directory, unless it was given."""
+        if self.scratch is not None:
+            self.scratch.cleanup()
+            self.scratch = None
+
+    def __enter__(self) -> "Simulation":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, kind: str, detail: str):
+        self.counts[kind] += 1
+        if self.keep_records:
+            self.records.append(Record(self.clock.time() - self.start, kind, detail))
+
+    def apply(self, action: str, argument: str):
+        if action == "create":
+            api.create(argument or "research", self.config, self.clock)
+        elif action == "pause":
+            api.pause(self.config, self.clock)
+        elif action == "resume":
+            api.resume(self.config, self.clock)
+        elif action == "delete":
+            api.delete(self.config, self.clock)
+        self.record("command", f"{action} {argument}".strip())
+
+    def run(self, duration: Optional[float] = None) -> float:
+        """Simulate until `duration` seconds; returns the real seconds taken."""
+        if duration is None:
+            duration = (self.timeline[-1][0] if self.timeline else 0) + 3600
+
+        started = time.perf_counter()
+        while self.clock.time() - self.start < duration:
+            self.step()
+        return time.perf_counter() - started
+
+    def step(self):
+        """One iteration of the status loop, then sleep until the next tick."""
+        pending = self.pending
+        while pending and pending[0][0] <= self.clock.time() - self.start:
+            _, action, argument = pending.popleft()
+            self.apply(action, argument)
+
+        self.pymodoro.tick()
+        self.pymodoro.wait()
+
+
+def soak_timeline(duration: float) -> List[Tuple[float, str, str]]:
+    """Sessions every two hours with a pause; every third one aborted."""
+    timeline = []
+    for n, start in enumerate(range(0, int(duration), 7200)):
+        timeline += [
+            (start, "create", "research"),
+            (start + 600, "pause", ""),
+            (start + 700, "resume", "")
+        ]
+        if n % 3 == 2:
+            timeline.append((start + 1200, "delete", ""))
+    return timeline
+
+
+def soak(ticks: int = 1_000_000, samples: int = 20, spawn: bool = True) -> List[str]:
+    """
+    Drive `ticks` ticks and return the resources that kept growing
+    after a warm up: traced memory beyond SOAK_MEMORY_LIMIT, file
+    descriptors, or unreaped children. The loop also writes extra
+    outputs and snapshots, and reloads its config periodically.
+    """
+    with Simulation(soak_timeline(ticks), keep_records=False, spawn=spawn,
+                    extra_outputs=True) as simulation:
+        resources = monitor.ResourceMonitor()
+        warm_up = ticks // 10
+        interval = max(1, (ticks - warm_up) // samples)
+
+        started = time.perf_counter()
+        for n in range(ticks):
+            simulation.step()
+            if n % SOAK_RELOAD_INTERVAL == 0:
+                simulation.reload()
+            if n >= warm_up and (n - warm_up) % interval == 0:
+                resources.sample()
+                print(f"{n:>9} ticks: {resources.report(top=0)}")
+        resources.sample()
+        elapsed = time.perf_counter() - started
+
+    print(resources.report())
+    print(f"{ticks} ticks in {elapsed:.1f}s, {dict(simulation.counts)}")
+
+    growth = resources.growth()
+    failures = []
+    if growth.memory > SOAK_MEMORY_LIMIT:
+        failures.append(f"memory grew by {growth.memory / 1024:.1f} KiB")
+    if growth.fds:
+        failures.append(f"{growth.fds} more open file descriptors")
+    if resources.last.zombies:
+        failures.append(f"{resources.last.zombies} zombie processes")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a session timeline in simulated time.")
+    parser.add_argument("timeline", nargs="?", help="Timeline file (default: a sample day).")
+    parser.add_argument("-d", "--duration", type=float, default=None, help="Simulated seconds.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print the summary.")
+    parser.add_argument("--soak", type=int, metavar="TICKS", default=None,
+                        help="Soak test the loop for TICKS ticks, failing on resource growth.")
+    options = parser.parse_args()
+
+    if options.soak:
+        failures = soak(options.soak)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+    text = DEFAULT_TIMELINE
+    if options.timeline:
+        with open(options.timeline, encoding="utf-8") as f:
+            text = f.read()
+
+    with Simulation(parse_timeline(text)) as simulation:
+        elapsed = simulation.run(options.duration)
+
+    if not options.quiet:
+        for record in simulation.records:
+            print(f"{record.time:8.0f}s {record.kind:8} {record.detail}")
+
+    simulated = simulation.clock.time() - simulation.start
+    print(f"Simulated {simulated:.0f}s in {elapsed:.2f}s "
+          f"({simulated / elapsed:.0f} simulated seconds per second), "
+          f"{len(simulation.records)} records.")
+
+
+if __name__ == "__main__":
+    main()
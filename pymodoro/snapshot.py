@@ -0,0 +1,93 @@
+"""
+Status snapshot for `pymodoro -o`.
+
+A running pymodoro publishes its latest output to a small snapshot
+file, together with the time until which that output stays valid and
+the fingerprints of the session and config files it depends on.
+Pollers calling `pymodoro -o` with the same arguments then print the
+snapshot while it is fresh, without importing or computing anything
+else. Only the standard library is imported here.
+
+"""
+from typing import Dict, List, Optional
+
+import hashlib
+import os
+import sys
+import time
+
+from . import atomic
+
+SNAPSHOT_DIR = os.path.expanduser("~/.cache/pymodoro")
+ONE_LINE_FLAGS = ("-o", "--one-line")
+
+
+def snapshot_path(argv: List[str]) -> str:
+    """Snapshots are keyed on the arguments that shape the output."""
+    key = "\0".join(arg for arg in argv if arg not in ONE_LINE_FLAGS)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(SNAPSHOT_DIR, f"snapshot-{digest}")
+
+
+def fingerprints(paths: List[str]) -> Dict[str, Optional[List[int]]]:
+    """Return (inode, size, mtime) of each path, None if missing."""
+    files: Dict[str, Optional[List[int]]] = {}
+    for path in paths:
+        path = os.path.expanduser(path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            files[path] = None
+            continue
+        files[path] = [st.st_ino, st.st_size, st.st_mtime_ns]
+    return files
+
+
+def write_cache(path: str, output: str, valid_until: Optional[float],
+                files: Dict[str, Optional[List[int]]]) -> None:
+    """
+    Atomically cache an output valid until `valid_until` (None means
+    no expiry) and while `files` keep these fingerprints.
+    """
+    atomic.write_json(path, {
+        "output": output,
+        "valid_until": valid_until,
+        "files": files
+    })
+
+
+def read_cache(path: str) -> Optional[str]:
+    """Return the cached output, or None if it is missing or stale."""
+    data = atomic.read_json(path)
+    if data is None:
+        return None
+
+    valid_until = data["valid_until"]
+    if valid_until is not None and time.time() >= valid_until:
+        return None
+    if fingerprints(list(data["files"])) != data["files"]:
+        return None
+
+    return data["output"]
+
+
+def publish(argv: List[str], output: str, valid_until: Optional[float],
+            files: Dict[str, Optional[List[int]]]) -> None:
+    write_cache(snapshot_path(argv), output, valid_until, files)
+
+
+def load(argv: List[str]) -> Optional[str]:
+    return read_cache(snapshot_path(argv))
+
+
+def main():
+    """Entry point of `pymodoro`: print a fresh snapshot or run."""
+    argv = sys.argv[1:]
+    if any(arg in ONE_LINE_FLAGS for arg in argv):
+        output = load(argv)
+        if output is not None:
+            sys.stdout.write(output)
+            return
+
+    from . import pymodoro
+    pymodoro.main()
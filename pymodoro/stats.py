@@ -0,0 +1,175 @@
+"""
+Incremental session statistics.
+
+Streaks, rolling averages and per-identifier totals are kept as a
+small persisted state together with the log offset it covers. Each
+update only parses the log lines appended since, and each new entry
+updates the aggregates in O(1); a rewritten log (e.g. after a bulk
+import) is replayed from the start. Days and the INTERVAL_MIN dedup
+follow `check_entries_day`.
+
+"""
+from typing import Dict, List, Optional
+
+import datetime
+import os
+
+from . import analytics, atomic, journal, snapshot
+from .session_control import ENTRY_PATTERN
+
+STATS_PATH = os.path.join(snapshot.SNAPSHOT_DIR, "stats.json")
+# Days of per-day counts kept, enough for the longest rolling average.
+WINDOW_DAYS = 30
+
+
+class Statistics():
+    def __init__(self, log_path: str, state_path: str = STATS_PATH):
+        self.log_path = log_path
+        self.state_path = state_path
+        self.reader = journal.JournalReader(log_path)
+        self.clear()
+        self.load()
+
+    def clear(self):
+        # Last entry epoch and kept session count of each identifier.
+        self.last_entry: Dict[str, int] = {}
+        self.totals: Dict[str, int] = {}
+        # Kept sessions per identifier and day, for the last WINDOW_DAYS.
+        self.days: Dict[str, Dict[int, int]] = {}
+        self.latest_day: Optional[int] = None
+
+        self.streak_end: Optional[int] = None
+        self.streak = 0
+        self.longest_streak = 0
+
+    def load(self):
+        state = atomic.read_json(self.state_path)
+        if state is None:
+            return
+
+        if state["log_path"] != self.log_path:
+            return
+        self.reader.inode = state["inode"]
+        self.reader.offset = state["offset"]
+        self.reader.header = state.get("header", "").encode("latin-1")
+        self.last_entry = state["last_entry"]
+        self.totals = state["totals"]
+        self.days = {
+            identifier: {int(day): n for day, n in days.items()}
+            for identifier, days in state["days"].items()
+        }
+        self.latest_day = state["latest_day"]
+        self.streak_end = state["streak_end"]
+        self.streak = state["streak"]
+        self.longest_streak = state["longest_streak"]
+
+    def save(self):
+        state = {
+            "log_path": self.log_path,
+            "inode": self.reader.inode,
+            "offset": self.reader.offset,
+            "header": self.reader.header.decode("latin-1"),
+            "last_entry": self.last_entry,
+            "totals": self.totals,
+            "days": self.days,
+            "latest_day": self.latest_day,
+            "streak_end": self.streak_end,
+            "streak": self.streak,
+            "longest_streak": self.longest_streak
+        }
+        atomic.write_json(self.state_path, state)
+
+    def update(self) -> "Statistics":
+        """Fold the log lines appended since the last update."""
+        reset, lines = self.reader.read()
+        if reset:
+            self.clear()
+
+        dates: List[str] = []
+        identifiers: List[str] = []
+        for line in lines:
+            match = ENTRY_PATTERN.match(line)
+            if match is not None:
+                dates.append(match.group(1))
+                identifiers.append(match.group(2))
+
+        if dates:
+            for epoch, identifier in zip(analytics.parse_log_dates(dates).tolist(), identifiers):
+                self.add(epoch, identifier)
+        if reset or lines:
+            self.save()
+        return self
+
+    def add(self, epoch: int, identifier: str):
+        """Account for one log entry, given as naive epoch seconds."""
+        last = self.last_entry.get(identifier)
+        self.last_entry[identifier] = epoch
+        if last is not None and abs(epoch - last) <= analytics.INTERVAL_MIN * 60:
+            return
+
+        day = (epoch - analytics.HOUR_LIMIT * 3600) // analytics.DAY_SECONDS
+        self.totals[identifier] = self.totals.get(identifier, 0) + 1
+
+        days = self.days.setdefault(identifier, {})
+        if self.latest_day is None or day > self.latest_day - WINDOW_DAYS:
+            days[day] = days.get(day, 0) + 1
+        if self.latest_day is None or day > self.latest_day:
+            self.latest_day = day
+            # Forget the days that left the window, one day at a time.
+            for counts in self.days.values():
+                for old in [d for d in counts if d <= day - WINDOW_DAYS]:
+                    del counts[old]
+
+        if self.streak_end is None or day > self.streak_end + 1:
+            self.streak = 1
+            self.streak_end = day
+        elif day == self.streak_end + 1:
+            self.streak += 1
+            self.streak_end = day
+        self.longest_streak = max(self.longest_streak, self.streak)
+
+    def day_count(self, day: int, identifier: Optional[str] = None) -> int:
+        if identifier is not None:
+            return self.days.get(identifier, {}).get(day, 0)
+        return sum(days.get(day, 0) for days in self.days.values())
+
+    def rolling_average(self, today: int, n_days: int) -> float:
+        return sum(
+            self.day_count(day)
+            for day in range(today - n_days + 1, today + 1)
+        ) / n_days
+
+    def current_streak(self, today: int) -> int:
+        """The streak still counts today until a session is missed."""
+        if self.streak_end is not None and today - self.streak_end <= 1:
+            return self.streak
+        return 0
+
+    def report(self, now: Optional[datetime.datetime] = None,
+               session_minutes: int = 25) -> dict:
+        now = now or datetime.datetime.now()
+        today = analytics.day_number(now)
+        return {
+            "current_streak": self.current_streak(today),
+            "longest_streak": self.longest_streak,
+            "today": self.day_count(today),
+            "average_7_days": self.rolling_average(today, 7),
+            "average_30_days": self.rolling_average(today, 30),
+            "sessions": dict(sorted(self.totals.items())),
+            "focus_minutes": {
+                identifier: n * session_minutes
+                for identifier, n in sorted(self.totals.items())
+            }
+        }
+
+
+def show(report: dict):
+    print(f"Current streak: {report['current_streak']} days")
+    print(f"Longest streak: {report['longest_streak']} days")
+    print(f"Today: {report['today']}")
+    print(f"7-day average: {report['average_7_days']:.2f}")
+    print(f"30-day average: {report['average_30_days']:.2f}")
+    print()
+    for identifier, n in report["sessions"].items():
+        minutes = report["focus_minutes"][identifier]
+        print(f"{identifier}: {n} sessions, {minutes // 60}h{minutes % 60:02d}")
@@ -13,12 +13,12 @@ setup(
     data_files=datafiles,
     entry_points={
         "console_scripts": [
-            "pymodoro = pymodoro.pymodoro:main",
+            "pymodoro = pymodoro.snapshot:main",
             "pymodoroi3 = pymodoro.pymodoroi3:main",
             "pymodoro_ctrl = pymodoro.session_control:main",
             "pymodoro_routine = pymodoro.routine_control:main",
             "pymodoro_signal = pymodoro.signal:main",
-            "pymodoro_session = pymodoro.session_selector:main"
+            "pymodoro_session = pymodoro.selector_client:main"
         ]
     },
 )
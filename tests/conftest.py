@@ -0,0 +1,26 @@
+import datetime
+
+import pytest
+
+from pymodoro import configuration
+from pymodoro.clock import VirtualClock
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """The default config, with HOME and every file it names in tmp_path."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    config = configuration.Config(args=False)
+    config.session_file = str(tmp_path / "session")
+    config.log_path = str(tmp_path / "log")
+    config.history_backend = "text"
+    config.publish_snapshot = False
+    config.output_profiles = []
+    config.enable_sound = False
+    config.enable_tick_sound = False
+    return config
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime.datetime(2024, 1, 1, 9))
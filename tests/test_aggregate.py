@@ -0,0 +1,56 @@
+import datetime
+import os
+
+from pymodoro import aggregate, analytics
+from pymodoro.session_control import DATE_FORMAT_LOG, check_entries_day
+
+
+def write_log(path, dates):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for date in dates:
+            f.write(f"[{date}] research session.\n")
+
+
+def make_team(tmp_path):
+    team = tmp_path / "team"
+    write_log(str(team / "alice" / ".pomodoro_log"), ["01/01/24 - 09:00:00"])
+    write_log(str(team / "bob" / ".pomodoro_log"), ["01/01/24 - 09:00:00", "01/01/24 - 11:00:00"])
+    return team
+
+
+def totals(merged):
+    return {user: sum(days.values()) for (user, _), days in merged.items()}
+
+
+def test_directory_mode_users(tmp_path):
+    team = make_team(tmp_path)
+    assert totals(aggregate.aggregate(str(team), jobs=1)) == {"alice": 1, "bob": 2}
+
+
+def test_glob_mode_users(tmp_path):
+    team = make_team(tmp_path)
+    pattern = str(team / "*" / ".pomodoro_log")
+    assert totals(aggregate.aggregate(pattern, jobs=1)) == {"alice": 1, "bob": 2}
+
+
+def test_named_logs(tmp_path):
+    write_log(str(tmp_path / "carol.log"), ["01/01/24 - 09:00:00"])
+    assert totals(aggregate.aggregate(str(tmp_path / "*.log"), jobs=1)) == {"carol": 1}
+
+
+def test_small_chunks_on_a_pool_match_check_entries_day(tmp_path):
+    start = datetime.datetime(2024, 1, 1, 6)
+    # Some entries closer than INTERVAL_MIN, on both sides of chunk bounds.
+    dates = [start + datetime.timedelta(minutes=13 * n) for n in range(300)]
+    write_log(str(tmp_path / "dave.log"), [date.strftime(DATE_FORMAT_LOG) for date in dates])
+
+    merged = aggregate.aggregate(str(tmp_path / "*.log"), jobs=2, chunk_size=256)
+    first = analytics.day_number(dates[0]) - 1
+    last = analytics.day_number(dates[-1])
+    epoch = datetime.datetime(1970, 1, 1, 12)
+    expected = {
+        day: len(check_entries_day(dates, epoch + datetime.timedelta(days=day), Verbose=0))
+        for day in range(first, last + 1)
+    }
+    assert merged[("dave", "research")] == {day: n for day, n in expected.items() if n}
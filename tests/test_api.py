@@ -0,0 +1,40 @@
+import datetime
+
+from pymodoro import api
+
+
+def test_session_lifecycle(config, clock):
+    assert api.status(config, clock) is None
+    assert api.create("research", config, clock)
+    assert not api.create("code", config, clock)
+    start = api.status(config, clock)
+
+    clock.advance(60)
+    status = api.status(config, clock)
+    assert status.ID == start.ID
+    assert not status.paused
+    assert status.seconds_left == start.seconds_left - 60
+
+    assert api.pause(config, clock)
+    assert not api.pause(config, clock)
+    clock.advance(120)
+    assert api.status(config, clock).paused
+    assert api.status(config, clock).seconds_left == status.seconds_left
+
+    assert api.resume(config, clock)
+    assert not api.resume(config, clock)
+    clock.advance(30)
+    assert api.status(config, clock).seconds_left == status.seconds_left - 30
+
+    assert api.delete(config, clock)
+    assert not api.delete(config, clock)
+    assert api.status(config, clock) is None
+
+
+def test_day_counts(config):
+    now = datetime.datetime(2024, 1, 3, 12)
+    api.log_entry("research", datetime.datetime(2024, 1, 1, 9), config)
+    api.log_entry("research", datetime.datetime(2024, 1, 1, 9, 10), config)
+    api.log_entry("research", datetime.datetime(2024, 1, 3, 9), config)
+    api.log_entry("code", datetime.datetime(2024, 1, 3, 10), config)
+    assert api.day_counts("research", 2, now, config) == [1, 0, 1]
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from pymodoro import atomic, signal, snapshot
+
+
+def test_failed_write_leaves_the_file_untouched(tmp_path):
+    path = str(tmp_path / "output")
+    atomic.write_json(path, {"output": "old"})
+
+    with pytest.raises(RuntimeError):
+        with atomic.writer(path) as f:
+            f.write("partial")
+            raise RuntimeError
+    assert atomic.read_json(path) == {"output": "old"}
+    assert os.listdir(tmp_path) == ["output"]
+
+
+def test_corrupt_json_reads_as_missing(tmp_path):
+    path = tmp_path / "cache"
+    path.write_text('{"output": ')
+    assert atomic.read_json(str(path)) is None
+    assert atomic.read_json(str(tmp_path / "missing")) is None
+
+
+def test_signal_prints_the_cached_output(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "signal")
+    monkeypatch.setattr(signal, "CACHE_PATH", path)
+    monkeypatch.setattr(signal, "compute", lambda: pytest.fail("the cache was not used"))
+    snapshot.write_cache(path, "<fc=#58fe22>OK</fc>\n", None, {})
+
+    signal.main()
+    assert capsys.readouterr().out == "<fc=#58fe22>OK</fc>\n"
@@ -0,0 +1,47 @@
+import datetime
+import io
+
+from pymodoro import bulk_import, export
+
+
+def test_imported_csv_exports_back(tmp_path):
+    log = tmp_path / "log"
+    log.write_text(bulk_import.format_entry(datetime.datetime(2024, 1, 2, 9), "research"))
+    source = tmp_path / "sessions.csv"
+    source.write_text(
+        "timestamp,identifier\n"
+        "2024-01-03T10:00:00,code\n"
+        "2024-01-01T08:30:00,research\n"
+        "not a date,research\n"
+        # Already in the log: not imported twice.
+        "02/01/24 - 09:00:00,research\n"
+    )
+
+    imported, errors = bulk_import.import_file(str(log), str(source))
+    assert imported == 3
+    assert errors == ["4: bad timestamp 'not a date'."]
+
+    out = io.StringIO()
+    export.write_csv(export.iter_entries(str(log)), out)
+    rows = [line.split(",")[:2] for line in out.getvalue().splitlines()[1:]]
+    assert rows == [
+        ["2024-01-01T08:30:00", "research"],
+        ["2024-01-02T09:00:00", "research"],
+        ["2024-01-03T10:00:00", "code"]
+    ]
+
+
+def test_merge_keeps_unparsed_lines_in_place(tmp_path):
+    log = tmp_path / "log"
+    log.write_text(
+        "[01/01/24 - 09:00:00] research session.\n"
+        "a note without a date\n"
+        "[03/01/24 - 09:00:00] research session.\n"
+    )
+    bulk_import.merge_entries(str(log), [(datetime.datetime(2024, 1, 2, 9), "code")])
+    assert log.read_text().splitlines() == [
+        "[01/01/24 - 09:00:00] research session.",
+        "a note without a date",
+        "[02/01/24 - 09:00:00] code session.",
+        "[03/01/24 - 09:00:00] research session."
+    ]
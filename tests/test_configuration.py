@@ -0,0 +1,12 @@
+import argparse
+
+import pytest
+
+from pymodoro import configuration
+
+
+def test_intervals_must_be_positive():
+    assert configuration.positive_int("2") == 2
+    for value in ("0", "-1"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            configuration.positive_int(value)
@@ -0,0 +1,23 @@
+import datetime
+
+from pymodoro import export
+from pymodoro.bulk_import import format_entry
+
+
+def write_log(path, dates):
+    with open(path, "w", encoding="utf-8") as f:
+        for date in dates:
+            f.write(format_entry(date, "research"))
+
+
+def test_until_does_not_stop_an_unsorted_scan(tmp_path):
+    log = str(tmp_path / "log")
+    write_log(log, [
+        datetime.datetime(2024, 1, 1, 9),
+        datetime.datetime(2024, 1, 5, 9),
+        # Out of order, e.g. an entry added by hand.
+        datetime.datetime(2024, 1, 2, 9)
+    ])
+
+    entries = export.iter_entries(log, until=datetime.datetime(2024, 1, 3))
+    assert [entry.timestamp.day for entry in entries] == [1, 2]
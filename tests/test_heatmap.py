@@ -0,0 +1,50 @@
+import datetime
+
+from pymodoro import heatmap, history
+
+
+class RecordingStore(history.TextStore):
+    def __init__(self, log_path):
+        history.TextStore.__init__(self, log_path)
+        self.since = []
+
+    def range(self, identifier, since=None, until=None):
+        self.since.append(since)
+        return history.TextStore.range(self, identifier, since, until)
+
+
+def rows(cache):
+    return {day: row.tolist() for day, row in cache.rows.items()}
+
+
+def test_refresh_reads_from_the_last_covered_day(tmp_path):
+    log = str(tmp_path / "log")
+    store = RecordingStore(log)
+    for hour in (9, 10, 11):
+        store.append(datetime.datetime(2024, 1, 1, hour), "research")
+    path = str(tmp_path / "heatmap.npz")
+    heatmap.Heatmap(path).refresh(store, "research", log)
+
+    store.append(datetime.datetime(2024, 1, 2, 9), "research")
+    store.append(datetime.datetime(2024, 1, 2, 9, 10), "research")
+    cache = heatmap.Heatmap(path).refresh(store, "research", log)
+    assert store.since[-1] == datetime.datetime(2024, 1, 1, 7)
+
+    full = heatmap.Heatmap(str(tmp_path / "full.npz")).refresh(history.TextStore(log), "research", log)
+    assert rows(cache) == rows(full)
+    assert cache.counts == full.counts
+    assert sum(cache.counts.values()) == 4
+
+
+def test_import_into_the_past_rebuilds(tmp_path):
+    log = str(tmp_path / "log")
+    store = history.TextStore(log)
+    store.append(datetime.datetime(2024, 1, 5, 9), "research")
+    path = str(tmp_path / "heatmap.npz")
+    heatmap.Heatmap(path).refresh(store, "research", log)
+
+    store.extend([(datetime.datetime(2024, 1, 1, 9), "research")])
+    cache = heatmap.Heatmap(path).refresh(store, "research", log)
+    days = sorted(cache.counts)
+    assert sum(cache.counts.values()) == 2
+    assert cache.matrix(days[0], days[-1]).any(axis=1).tolist() == [True, False, False, False, True]
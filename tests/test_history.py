@@ -0,0 +1,67 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from pymodoro import analytics, api, configuration, history, session_control
+
+
+def make_config(tmp_path, backend):
+    config = configuration.Config.__new__(configuration.Config)
+    config.log_path = str(tmp_path / "log")
+    config.history_db_path = str(tmp_path / "history.sqlite3")
+    config.history_backend = backend
+    return config
+
+
+def test_sqlite_store_writes_the_log(tmp_path):
+    config = make_config(tmp_path, "sqlite")
+    store = history.open_store(config)
+    store.append(datetime.datetime(2024, 1, 1, 9), "research")
+
+    text = history.open_store(config, "text")
+    assert text.range("research").tolist() == store.range("research").tolist()
+
+    # Entries written to the log by other writers are indexed too.
+    text.append(datetime.datetime(2024, 1, 1, 10), "research")
+    assert len(store.range("research")) == 2
+
+
+@pytest.mark.parametrize("backend", ["text", "sqlite"])
+def test_day_counts_match_check_entries_day(tmp_path, backend):
+    rng = np.random.default_rng(0)
+    now = datetime.datetime(2024, 3, 1, 12)
+    gaps = rng.integers(60, 4 * 3600, 400)
+    epochs = analytics.to_epoch([now])[0] - np.cumsum(gaps)[::-1]
+    dates = analytics.from_epoch(epochs)
+
+    config = make_config(tmp_path, backend)
+    history.open_store(config).extend([(date, "research") for date in dates])
+
+    expected = [
+        len(session_control.check_entries_day(
+            dates, now - datetime.timedelta(days=day), Verbose=0))
+        for day in range(7, -1, -1)
+    ]
+    assert api.day_counts("research", 7, now, config) == expected
+
+
+def test_text_store_cache_follows_the_log(tmp_path):
+    log = tmp_path / "log"
+    store = history.TextStore(str(log))
+    store.append(datetime.datetime(2024, 1, 1, 9), "research")
+    assert len(store.range("research")) == 1
+
+    # Appended lines are folded in, a partial line once it is complete.
+    store.append(datetime.datetime(2024, 1, 1, 10), "research")
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("[01/01/24 - 11:00:00] research")
+    assert len(store.range("research")) == 2
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(" session.\n")
+    assert len(store.range("research")) == 3
+
+    # A rewritten log is scanned again.
+    store.extend([(datetime.datetime(2023, 12, 31, 9), "research")])
+    assert store.range("research").tolist() == history.TextStore(str(log)).range("research").tolist()
+    assert len(store.range("research", since=datetime.datetime(2024, 1, 1))) == 3
@@ -0,0 +1,67 @@
+import datetime
+import os
+
+from pymodoro import journal, session_control
+from pymodoro.clock import VirtualClock
+
+
+def recreate(path, records, reader):
+    """Replace the journal, reusing the inode the reader knows."""
+    journal.remove(path)
+    journal.write(path, records)
+    reader.inode = os.stat(path).st_ino
+
+
+def test_reader_resets_on_same_size_header(tmp_path):
+    path = str(tmp_path / "session")
+    journal.write(path, ["VJ05FT", "01/01/24 - 09:00:00", "25 5 research"])
+    reader = journal.JournalReader(path)
+    assert reader.read() == (True, ["VJ05FT", "01/01/24 - 09:00:00", "25 5 research"])
+
+    recreate(path, ["3V6HRI", "01/01/24 - 10:00:00", "25 5 research"], reader)
+    assert reader.read() == (True, ["3V6HRI", "01/01/24 - 10:00:00", "25 5 research"])
+    assert reader.read() == (False, [])
+
+
+def test_reader_resets_on_larger_journal(tmp_path):
+    path = str(tmp_path / "session")
+    journal.write(path, ["VJ05FT", "01/01/24 - 09:00:00", "25 5"])
+    reader = journal.JournalReader(path)
+    reader.read()
+
+    records = ["3V6HRI", "01/01/24 - 10:00:00", "25 5 research", "01/01/24 - 10:05:00"]
+    recreate(path, records, reader)
+    assert reader.read() == (True, records)
+
+
+def test_session_sees_recreated_session(tmp_path):
+    clock = VirtualClock(datetime.datetime(2024, 1, 1, 9))
+    path = str(tmp_path / "session")
+
+    session_control.Session(path, clock).write_session_file()
+    running = session_control.Session(path, clock)
+    old_id = running.ID
+
+    clock.advance(3600)
+    new = session_control.Session(path, clock)
+    new.ID = session_control.Session.generate_id()
+    new.CREATION_DATE = clock.now().replace(microsecond=0)
+    journal.remove(path)
+    new.write_session_file()
+    running.journal.inode = os.stat(path).st_ino
+
+    assert running.get_seconds_left() == 25 * 60
+    assert running.ID == new.ID != old_id
+
+
+def test_resumed_reader_keeps_reading_events(tmp_path):
+    path = str(tmp_path / "log")
+    journal.write(path, ["a", "b", "c", "d"])
+    reader = journal.JournalReader(path)
+    reader.inode = os.stat(path).st_ino
+    reader.offset = os.path.getsize(path)
+
+    journal.append(path, "e")
+    assert reader.read() == (False, ["e"])
+    journal.append(path, "f")
+    assert reader.read() == (False, ["f"])
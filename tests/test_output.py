@@ -0,0 +1,43 @@
+from pymodoro import api
+from pymodoro.pymodoro import Pymodoro
+
+
+class RecordingPymodoro(Pymodoro):
+    def __init__(self, config, clock):
+        self.written = []
+        Pymodoro.__init__(self, config, clock)
+
+    def write_output(self, output):
+        self.written.append(output)
+
+
+def run(pymodoro, clock, ticks):
+    for _ in range(ticks):
+        pymodoro.tick()
+        clock.advance(1)
+
+
+def test_changes_only_skips_unchanged_output(config, clock):
+    config.output_changes_only = True
+    pymodoro = RecordingPymodoro(config, clock)
+    run(pymodoro, clock, 3)
+    assert len(pymodoro.written) == 1
+
+    api.create("research", config, clock)
+    run(pymodoro, clock, 3)
+    assert len(pymodoro.written) == 2
+    assert pymodoro.written[0] != pymodoro.written[1]
+
+
+def test_changes_only_heartbeat(config, clock):
+    config.output_changes_only = True
+    config.heartbeat_interval_in_seconds = 5
+    pymodoro = RecordingPymodoro(config, clock)
+    run(pymodoro, clock, 11)
+    assert len(pymodoro.written) == 3
+
+
+def test_every_tick_is_written_by_default(config, clock):
+    pymodoro = RecordingPymodoro(config, clock)
+    run(pymodoro, clock, 3)
+    assert len(pymodoro.written) == 3
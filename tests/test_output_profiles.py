@@ -0,0 +1,45 @@
+import os
+
+from pymodoro import api, outputs
+from pymodoro.pymodoro import Pymodoro
+
+
+def test_fifo_without_reader_does_not_block(tmp_path):
+    path = str(tmp_path / "fifo")
+    sink = outputs.OutputSink(path, fifo=True)
+    sink.write("P ####\n")
+    assert sink.fd is None
+
+    reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        sink.write("P ####\n")
+        assert os.read(reader, 100) == b"P ####\n"
+        # Unchanged lines are not repeated.
+        sink.write("P ####\n")
+        sink.write("P ###\n")
+        assert os.read(reader, 100) == b"P ###\n"
+    finally:
+        os.close(reader)
+
+    # The reader went away.
+    sink.write("P ##\n")
+    assert sink.fd is None
+
+
+def test_profiles_render_the_same_state(config, clock, tmp_path):
+    config.markup = "xmobar"
+    plain = outputs.OutputProfile("plain", config, str(tmp_path / "plain"))
+    plain.markup = "plain"
+    config.output_profiles = [
+        plain,
+        outputs.OutputProfile("fifo", config, str(tmp_path / "fifo"), fifo=True)
+    ]
+    api.create("research", config, clock)
+    pymodoro = Pymodoro(config, clock)
+    pymodoro.write_output = lambda output: None
+    pymodoro.tick()
+
+    text = (tmp_path / "plain").read_text()
+    assert "<fc=" not in text
+    assert text.strip() in pymodoro.last_output
+    assert os.path.exists(tmp_path / "fifo")
@@ -0,0 +1,83 @@
+import os
+
+from pymodoro import plugins
+
+TRANSITION = plugins.Transition("ACTIVE", "BREAK", "ABC123", "research", 0.0, 0.0, 0)
+
+
+def write(path, text, mtime=None):
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_dispatch_to_subscribers(tmp_path):
+    calls = tmp_path / "calls"
+    write(tmp_path / "a.py", (
+        "def on_complete(transition):\n"
+        f"    open({str(calls)!r}, 'a').write('a ' + transition.identifier + '\\n')\n"
+    ))
+    write(tmp_path / "b.py", (
+        "def register(registry):\n"
+        f"    registry.subscribe('start', lambda t: open({str(calls)!r}, 'a').write('b\\n'))\n"
+    ))
+    # Never imported: it defines no entry point.
+    write(tmp_path / "c.py", f"open({str(calls)!r}, 'a').write('c\\n')\n")
+
+    hooks = plugins.PluginHooks(str(tmp_path))
+    assert hooks.dispatch(["transition", "complete"], TRANSITION) == 1
+    assert calls.read_text() == "a research\n"
+    assert hooks.dispatch(["start"], TRANSITION) == 1
+    assert calls.read_text() == "a research\nb\n"
+
+
+def test_changed_module_is_reloaded(tmp_path):
+    path = tmp_path / "hook.py"
+    write(path, "def on_complete(transition):\n    pass\n", mtime=1_000_000_000)
+    hooks = plugins.PluginHooks(str(tmp_path))
+    assert hooks.dispatch(["complete"], TRANSITION) == 1
+
+    write(path, "def on_start(transition):\n    pass\n", mtime=2_000_000_000)
+    assert hooks.dispatch(["complete"], TRANSITION) == 0
+    assert hooks.dispatch(["start"], TRANSITION) == 1
+
+    path.unlink()
+    assert hooks.dispatch(["start"], TRANSITION) == 0
+
+
+def test_failures_are_reported_and_skipped(tmp_path, capsys):
+    write(tmp_path / "broken.py", "def on_complete(transition):\n    raise ValueError\n")
+    write(tmp_path / "unknown_event.py", "def register(registry):\n    registry.subscribe('nope', print)\n")
+    hooks = plugins.PluginHooks(str(tmp_path))
+    assert hooks.dispatch(["complete"], TRANSITION) == 1
+
+    err = capsys.readouterr().err
+    assert "broken.py failed on 'complete'" in err
+    assert "unknown_event.py failed to load" in err
+
+
+def test_pymodoro_dispatches_transitions(config, clock, tmp_path):
+    from pymodoro import api
+    from pymodoro.pymodoro import Pymodoro
+
+    calls = tmp_path / "calls"
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    write(directory / "hook.py", (
+        "def register(registry):\n"
+        "    for event in ('transition', 'start', 'complete'):\n"
+        f"        registry.subscribe(event, lambda t, e=event: open({str(calls)!r}, 'a').write(e + '\\n'))\n"
+    ))
+    config.hook_mode = "plugin"
+    config.plugins_dir = str(directory)
+
+    api.create("research", config, clock)
+    pymodoro = Pymodoro(config, clock)
+    pymodoro.write_output = lambda output: None
+    pymodoro.notify = lambda strings: None
+    seconds_left = pymodoro.tick().seconds_left
+    assert not calls.exists()
+
+    clock.advance(seconds_left - 1)
+    pymodoro.tick()
+    assert calls.read_text().split() == ["transition", "complete"]
@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+from pymodoro import query
+from pymodoro.bulk_import import format_entry
+
+
+def test_query_counts_an_unsorted_log(tmp_path):
+    log = tmp_path / "log"
+    log.write_text("".join([
+        format_entry(datetime.datetime(2024, 1, 1, 9), "research"),
+        format_entry(datetime.datetime(2024, 1, 1, 9, 5), "research"),
+        format_entry(datetime.datetime(2024, 1, 6, 10), "research"),
+        format_entry(datetime.datetime(2024, 1, 2, 10), "code"),
+        format_entry(datetime.datetime(2024, 1, 2, 11), "research")
+    ]))
+
+    q = query.Query(
+        identifier="res*",
+        until=datetime.datetime(2024, 1, 3),
+        weekdays=query.parse_weekdays("mon-fri")
+    )
+    # The 09:05 session is dropped by the dedup.
+    assert query.run(str(log), q) == {"2024-01-01": 1, "2024-01-02": 1}
+
+
+def test_parse_weekdays_wraps_the_week():
+    assert query.parse_weekdays("sat-mon") == {5, 6, 0}
+
+
+@pytest.mark.parametrize("parse, value", [
+    (query.parse_weekdays, "xyz"),
+    (query.parse_time_window, "9"),
+    (query.parse_time_window, "09:00-ab")
+])
+def test_invalid_filters_raise_value_error(parse, value):
+    with pytest.raises(ValueError):
+        parse(value)
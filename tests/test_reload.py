@@ -0,0 +1,54 @@
+import os
+import signal
+import time
+
+from pymodoro.pymodoro import Pymodoro
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_sighup_swaps_the_config(config, clock):
+    pymodoro = Pymodoro(config, clock)
+    pymodoro.write_output = lambda output: None
+    pymodoro.tick()
+
+    with open(config._file, encoding="utf-8") as f:
+        text = f.read()
+    with open(config._file, "w", encoding="utf-8") as f:
+        f.write(text.replace('pomodoro_prefix = "P "', 'pomodoro_prefix = "X "'))
+
+    handler = signal.getsignal(signal.SIGHUP)
+    try:
+        pymodoro.start_config_watcher()
+        os.kill(os.getpid(), signal.SIGHUP)
+        wait_for(lambda: pymodoro.pending_config is not None)
+    finally:
+        pymodoro.running = False
+        signal.signal(signal.SIGHUP, handler)
+
+    pymodoro.tick()
+    assert pymodoro.pending_config is None
+    assert pymodoro.config is not config
+    assert pymodoro.config.pomodoro_prefix == "X "
+
+
+def test_broken_config_keeps_the_current_one(config, clock, capsys):
+    pymodoro = Pymodoro(config, clock)
+    with open(config._file, "a", encoding="utf-8") as f:
+        f.write("[General]\n")
+
+    handler = signal.getsignal(signal.SIGHUP)
+    try:
+        pymodoro.start_config_watcher()
+        os.kill(os.getpid(), signal.SIGHUP)
+        wait_for(lambda: "reload failed" in capsys.readouterr().err)
+    finally:
+        pymodoro.running = False
+        signal.signal(signal.SIGHUP, handler)
+
+    assert pymodoro.pending_config is None
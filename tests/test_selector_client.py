@@ -0,0 +1,23 @@
+import socket
+
+from pymodoro import selector_client
+
+
+def test_no_resident_selector(tmp_path, monkeypatch):
+    monkeypatch.setattr(selector_client, "SOCKET_PATH", str(tmp_path / "selector.sock"))
+    assert not selector_client.show_resident()
+
+
+def test_resident_selector_is_asked_to_show(tmp_path, monkeypatch):
+    path = str(tmp_path / "selector.sock")
+    monkeypatch.setattr(selector_client, "SOCKET_PATH", path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    try:
+        assert selector_client.show_resident()
+        connection, _ = server.accept()
+        with connection:
+            assert connection.recv(64) == b"show\n"
+    finally:
+        server.close()
@@ -0,0 +1,61 @@
+import os
+import re
+
+from pymodoro import configuration, simulation
+
+
+def tree(directory):
+    """Path -> (size, mtime) of every file under `directory`."""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def test_simulation_leaves_the_real_config_untouched(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    configuration.Config(args=False)
+    config_file = tmp_path / ".config" / "pymodoro" / "config"
+    text = re.sub(r"(?m)^history = .*$", "history = sqlite", config_file.read_text())
+    text = re.sub(r"(?m)^hooks = .*$", "hooks = plugin", text)
+    config_file.write_text(text)
+    assert configuration.Config(args=False).hook_mode == "plugin"
+    plugins = tmp_path / ".pymodoro" / "plugins"
+    plugins.mkdir(parents=True)
+    (plugins / "record.py").write_text(
+        f"def on_transition(transition):\n"
+        f"    open({str(tmp_path / 'called')!r}, 'w').close()\n")
+    before = tree(tmp_path)
+
+    timeline = simulation.parse_timeline(simulation.DEFAULT_TIMELINE)
+    with simulation.Simulation(timeline) as run:
+        assert run.config.history_backend == "text"
+        assert run.config.hook_mode == "process"
+        run.run()
+        directory = run.directory
+        assert any(kind == "state" for _, kind, _ in run.records)
+
+    assert tree(tmp_path) == before
+    assert not os.path.exists(directory)
+
+
+def test_step_drives_the_outputs_and_reloads(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    timeline = simulation.parse_timeline("0 create research")
+    with simulation.Simulation(timeline, extra_outputs=True) as run:
+        run.step()
+        run.reload()
+        run.step()
+        assert run.pymodoro.pending_config is None
+        assert run.pymodoro.config is not run.config
+        with open(os.path.join(run.directory, "output"), encoding="utf-8") as f:
+            assert f.read().startswith(run.last_output.rstrip("\n"))
+        assert os.path.exists(os.path.join(run.directory, "snapshot"))
+
+
+def test_soak_finds_no_leak(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert simulation.soak(ticks=3000, samples=2, spawn=False) == []
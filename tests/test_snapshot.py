@@ -0,0 +1,28 @@
+import time
+
+from pymodoro import snapshot
+
+
+def test_snapshot_key_ignores_the_one_line_flag():
+    assert snapshot.snapshot_path(["-o", "-l", "20"]) == snapshot.snapshot_path(["-l", "20"])
+    assert snapshot.snapshot_path(["-l", "20"]) != snapshot.snapshot_path(["-l", "10"])
+
+
+def test_snapshot_is_invalidated_by_a_session_change(tmp_path):
+    session = tmp_path / "session"
+    session.write_text("header\n")
+    path = str(tmp_path / "snapshot")
+    snapshot.write_cache(path, "P 24:59\n", time.time() + 60, snapshot.fingerprints([str(session)]))
+    assert snapshot.read_cache(path) == "P 24:59\n"
+
+    with open(session, "a") as f:
+        f.write("pause\n")
+    assert snapshot.read_cache(path) is None
+
+
+def test_snapshot_expires(tmp_path):
+    path = str(tmp_path / "snapshot")
+    snapshot.write_cache(path, "P 24:59\n", time.time() - 1, {})
+    assert snapshot.read_cache(path) is None
+    snapshot.write_cache(path, "\n", None, {})
+    assert snapshot.read_cache(path) == "\n"
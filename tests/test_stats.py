@@ -0,0 +1,23 @@
+import datetime
+
+import pytest
+
+from pymodoro import session_control, stats
+from pymodoro.bulk_import import format_entry
+
+
+@pytest.mark.parametrize("hour", [3, 9])
+def test_today_matches_check_entries_day(tmp_path, hour):
+    dates = [
+        datetime.datetime(2024, 1, 1, 10),
+        # Before HOUR_LIMIT: still a session of January 1st.
+        datetime.datetime(2024, 1, 2, 2)
+    ]
+    log = tmp_path / "log"
+    log.write_text("".join(format_entry(date, "research") for date in dates))
+    now = datetime.datetime(2024, 1, 2, hour)
+
+    statistics = stats.Statistics(str(log), str(tmp_path / "stats.json")).update()
+    expected = session_control.check_entries_day(dates, now, Verbose=0)
+    # Both sessions belong to yesterday, even before HOUR_LIMIT.
+    assert statistics.report(now)["today"] == len(expected) == 0
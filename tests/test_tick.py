@@ -0,0 +1,45 @@
+from pymodoro import api, session_control
+from pymodoro.pymodoro import Pymodoro
+
+
+def make_pymodoro(config, clock):
+    api.create("research", config, clock)
+    pymodoro = Pymodoro(config, clock)
+    pymodoro.write_output = lambda output: None
+    return pymodoro
+
+
+def test_one_session_read_per_tick(config, clock, monkeypatch):
+    pymodoro = make_pymodoro(config, clock)
+
+    reads = []
+    get_seconds_left = session_control.Session.get_seconds_left
+
+    def counted(session, *args):
+        reads.append(args)
+        return get_seconds_left(session, *args)
+
+    monkeypatch.setattr(session_control.Session, "get_seconds_left", counted)
+    for _ in range(3):
+        pymodoro.tick()
+        clock.advance(1)
+    assert len(reads) == 3
+
+
+def test_transition_sees_the_tick_of_its_iteration(config, clock):
+    pymodoro = make_pymodoro(config, clock)
+    transitions = []
+    pymodoro.run_hooks = lambda old, new, tick: transitions.append((old, new, tick))
+
+    clock.advance(config.session_duration_in_seconds - 5)
+    ticks = []
+    for _ in range(10):
+        ticks.append(pymodoro.tick())
+        clock.advance(1)
+
+    assert transitions
+    for old, new, tick in transitions:
+        assert tick in ticks
+        assert (old, new) == (tick.state, tick.next_state) == (Pymodoro.ACTIVE_STATE, Pymodoro.BREAK_STATE)
+    assert transitions[0][2].seconds_left == 1
+    assert pymodoro.state == Pymodoro.BREAK_STATE